@@ -6,15 +6,96 @@ with logger.span("import_time"):
 with logger.span("import_asyncio"):
     import asyncio
 
-with logger.span("import_modal"):
-    from modal import Image, App, fastapi_endpoint, asgi_app, Secret
+with logger.span("import_dataclasses"):
+    from dataclasses import dataclass, field
+    from typing import Any
 
-with logger.span("import_diffusion_processor"):
-    from src.diffusion_processor import get_diffusion_processor, process_base64_frame
+with logger.span("import_base64"):
+    # pybase64 (SIMD) is only installed in the Modal image and is a drop-in for the stdlib module
+    try:
+        import pybase64 as base64
+    except ImportError:
+        import base64
+
+# Use libuv's event loop for the WebSocket server. Set at import time so it is in place
+# before the container creates the loop the ASGI app runs on; uvloop is only installed in
+# the Modal image, so local runs keep the default loop.
+with logger.span("install_uvloop"):
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        logger.info("uvloop not available, using the default asyncio event loop")
+
+with logger.span("import_modal"):
+    from modal import Image, App, fastapi_endpoint, asgi_app, enter, Secret, Volume
 
 # Define default style prompt as a constant
 DEFAULT_STYLE_PROMPT = "A painting in the style of van Gogh's 'Starry Night'"
 
+# Processor used when a client doesn't ask for one; the only processor loaded at runtime
+DEFAULT_PROCESSOR_TYPE = "lightning"
+
+# Streams without a broadcaster and without frames for this long are evicted, so
+# clients that vanish without a clean disconnect don't pin their frames in memory
+STREAM_IDLE_TIMEOUT = 300  # seconds
+STREAM_REAP_INTERVAL = 60  # seconds
+
+# Frames are sent to text clients as bare base64 JPEG; clients add the data URL prefix
+FRAME_ENCODING = "base64-jpeg"
+
+# Modal has a 2MB limit on WebSocket messages; frames (raw JPEG bytes or base64
+# characters, as received) are rejected above this size, leaving some margin below it
+MAX_FRAME_BYTES = int(1.9 * 1024 * 1024)
+
+# A viewer whose frame send doesn't complete within this time is treated as gone, so a
+# stalled connection doesn't keep a sender task blocked indefinitely
+FRAME_SEND_TIMEOUT = 2.0  # seconds
+
+# How long the /streams listing is served from cache before it is rebuilt
+STREAMS_CACHE_TTL = 0.25  # seconds
+
+# Per-frame progress is logged at debug level, with an info summary every this many frames
+FRAME_LOG_EVERY = 30
+
+@dataclass(slots=True)
+class Stream:
+    """State of a stream: the broadcaster's settings and its latest frames"""
+    processor_type: str
+    # The processor for processor_type, resolved whenever that changes instead of per frame
+    processor: Any
+    style_prompt: str = DEFAULT_STYLE_PROMPT
+    negative_prompt: str = "ugly, deformed, disfigured, poor details, bad anatomy"
+    strength: float = 0.9
+    # Holds only the newest unprocessed frame
+    frame_queue: asyncio.Queue = field(default_factory=lambda: asyncio.Queue(maxsize=1))
+    # Single consumer that processes the newest frame whenever one is available
+    worker: asyncio.Task | None = None
+    processing: bool = False
+    # The latest processed frame for new viewers, as base64 text and as raw JPEG bytes
+    latest_processed_frame: str | None = None
+    latest_processed_bytes: bytes | None = None
+    # Set when the broadcaster ends the stream or the last broadcaster disconnects
+    stream_ended: bool = False
+    # Last connect or frame, for idle eviction
+    last_activity: float = field(default_factory=time.monotonic)
+    # Processed frames, to sample per-frame logging
+    frame_count: int = 0
+    # Serialized start of the stream's frame messages, see build_frame_payload
+    frame_payload_prefix: str | None = None
+
+
+# Processor configuration shared by the image build and container startup, so the
+# model baked into the image is exactly the one loaded at runtime. Only the lightning
+# processor is served; the standard one is neither built nor loaded.
+LIGHTNING_PROCESSOR_CONFIG = {
+    "use_controlnet": True,
+    "style_prompt": DEFAULT_STYLE_PROMPT,
+    "strength": 0.9,
+    "num_steps": 4,
+    "torch_dtype": "bfloat16"
+}
+
 # Function to run during image building
 def build_initialize_models():
     """
@@ -29,35 +110,17 @@ def build_initialize_models():
         # Import the processor modules
         from src.diffusion_processor import get_diffusion_processor
         
-        # Configuration for both processors - just for initialization
-        standard_processor_config = {
-            "use_controlnet": True,
-            "style_prompt": "A painting in the style of van Gogh's 'Starry Night'",
-            "strength": 0.9
-        }
-
-        lightning_processor_config = {
-            "use_controlnet": True,
-            "style_prompt": "A painting in the style of van Gogh's 'Starry Night'",
-            "strength": 0.9,
-            "num_steps": 4
-        }
-        
-        # Initialize both processors during build
-        logger.info("Initializing standard diffusion processor...")
-        standard_processor = get_diffusion_processor(
-            processor_type="standard",
-            **standard_processor_config
-        )
-        
         logger.info("Initializing lightning diffusion processor...")
         lightning_processor = get_diffusion_processor(
             processor_type="lightning",
-            **lightning_processor_config
+            **LIGHTNING_PROCESSOR_CONFIG
         )
         
-        # Free up memory (these won't be used yet)
-        del standard_processor, lightning_processor
+        # Free up memory (it won't be used yet)
+        del lightning_processor
+        
+        # Persist the compiled kernels for the runtime containers
+        compile_cache.commit()
         
         # Try to clean up GPU memory
         import torch
@@ -89,34 +152,17 @@ def init_global_processors():
     
     logger.info("Initializing global image processors during container startup...")
     
-    # Configuration for both processors
-    # standard_processor_config = {
-    #     "use_controlnet": True,
-    #     "style_prompt": DEFAULT_STYLE_PROMPT,
-    #     "strength": 0.9
-    # }
-
-    lightning_processor_config = {
-        "use_controlnet": True,
-        "style_prompt": DEFAULT_STYLE_PROMPT,
-        "strength": 0.9,
-        "num_steps": 4
-    }
-    
-    # Standard processor with more steps
-    # standard_processor = get_diffusion_processor(
-    #     processor_type="standard",
-    #     **standard_processor_config
-    # )
+    # Imported here so containers that never load a model (e.g. health) skip torch and diffusers
+    with logger.span("import_diffusion_processor"):
+        from src.diffusion_processor import get_diffusion_processor
     
     # Lightning processor with fewer steps
     lightning_processor = get_diffusion_processor(
         processor_type="lightning",
-        **lightning_processor_config
+        **LIGHTNING_PROCESSOR_CONFIG
     )
 
     global_processors = {
-        # "standard": standard_processor,
         "lightning": lightning_processor
     }
     
@@ -124,13 +170,14 @@ def init_global_processors():
     return global_processors
 
 
-with logger.span("init_global_processors"):
-    init_global_processors()
-
-
 with logger.span("app_init"):
     app = App("dreamstream-livestream-processor")
 
+    # Inductor artifacts persist across containers, so cold starts reuse the compiled
+    # kernels instead of recompiling the UNet (model weights are already baked into the image)
+    COMPILE_CACHE_DIR = "/root/.cache/torch-compile"
+    compile_cache = Volume.from_name("dreamstream-compile-cache", create_if_missing=True)
+
     # IMPORTANT: Modal requires the run_function call to come BEFORE add_local_* methods
     ml_image = (Image
                 .debian_slim(python_version="3.12")
@@ -142,7 +189,30 @@ with logger.span("app_init"):
                     poetry_lockfile="./poetry.lock",
                     without=["dev"],
                 )
-                .run_function(build_initialize_models)
+                .apt_install("libturbojpeg0")
+                .pip_install(
+                    "torchao>=0.9.0,<0.11.0",
+                    "PyTurboJPEG>=1.7.0,<2.0.0",
+                    "nvidia-nvimgcodec-cu12>=0.5.0,<0.6.0",
+                    "orjson>=3.10.0,<4.0.0",
+                    "uvloop>=0.21.0,<0.22.0",
+                    "pybase64>=1.4.0,<2.0.0",
+                )
+                .env({
+                    "TORCHINDUCTOR_CACHE_DIR": COMPILE_CACHE_DIR,
+                    "TORCHINDUCTOR_FX_GRAPH_CACHE": "1",
+                    "TORCHINDUCTOR_AUTOGRAD_CACHE": "1",
+                    # Grow allocator segments in place rather than carving fixed blocks,
+                    # so long-running containers don't fragment into reserved >> allocated
+                    "PYTORCH_CUDA_ALLOC_CONF": "expandable_segments:True",
+                })
+                # Built on a GPU so the processors compile and capture their CUDA graphs
+                # here, leaving the Inductor artifacts in the compile cache for runtime
+                .run_function(
+                    build_initialize_models,
+                    gpu="H100",
+                    volumes={COMPILE_CACHE_DIR: compile_cache}
+                )
                 .add_local_python_source("_remote_module_non_scriptable")
                 .add_local_python_source("src"))
 
@@ -155,20 +225,125 @@ async def health():
     return {"status": "ok", "service": "livestream-processor"}
 
 # Native Modal WebSocket server
-@app.function(
+@app.cls(
     image=ml_image, 
     allow_concurrent_inputs=10, 
     secrets=[Secret.from_name("custom-secret"), Secret.from_name("huggingface")], 
     gpu="H100",
-    timeout=600  # Increase timeout to 10 minutes
+    timeout=600,  # Increase timeout to 10 minutes
+    volumes={COMPILE_CACHE_DIR: compile_cache}
 )
-@asgi_app()
-def websocket_server():
+class WebSocketServer:
+    @enter()
+    def load_processors(self):
+        """Load the models once per GPU container, before it accepts connections"""
+        with logger.span("init_global_processors"):
+            init_global_processors()
+    
+    # Pin the label so the endpoint keeps the hostname it had as a plain function,
+    # instead of one derived from the class name
+    @asgi_app(label="dreamstream-livestream-processor-websocket-server")
+    def websocket_server(self):
+        return create_websocket_app()
+
+
+def create_websocket_app():
+    """Build the FastAPI app serving the broadcaster and viewer WebSockets"""
     from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Query
+    from fastapi.responses import ORJSONResponse, Response
+    from functools import partial
+    import orjson
+    
+    from src.diffusion_processor import process_bytes_frame
     
-    app = FastAPI(title="Livestream Processor WebSocket Server")
+    app = FastAPI(title="Livestream Processor WebSocket Server", default_response_class=ORJSONResponse)
     active_connections = {}
     streams = {}
+    # Connections that receive frames as binary JPEG messages
+    binary_clients = set()
+    # Broadcaster connections, which may also receive processed frames but must never
+    # be closed by the frame path: their socket carries the stream itself
+    broadcaster_clients = set()
+    # Connections mapped to the last frame metadata sent to them
+    frame_meta_sent = {}
+    # Connections receiving frames, mapped to (queue holding their next frame, sender task)
+    frame_senders = {}
+    
+    async def receive_message(websocket: WebSocket):
+        """
+        Receive the next message: raw bytes for binary frames, otherwise the JSON text
+        message parsed with orjson instead of the stdlib json module
+        """
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(message.get("code", 1000))
+        if message.get("bytes") is not None:
+            return message["bytes"]
+        return orjson.loads(message["text"])
+    
+    async def send_json(websocket: WebSocket, data):
+        """Send a JSON text message serialized with orjson"""
+        # Sent as a text frame: the web clients parse event.data as a string
+        await websocket.send_text(orjson.dumps(data).decode())
+    
+    async def broadcast_json(websockets, data, description="message"):
+        """
+        Serialize a JSON message once and send it to all connections concurrently,
+        removing and closing the connections a send failed on
+        """
+        payload = orjson.dumps(data).decode()
+        # Copy first: the set can change while the sends are in flight
+        receivers = list(websockets)
+        results = await asyncio.gather(
+            *(receiver.send_text(payload) for receiver in receivers),
+            return_exceptions=True
+        )
+        failed = []
+        for receiver, result in zip(receivers, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error notifying viewer of {description}, removing it: {result}")
+                websockets.discard(receiver)
+                stop_frame_sender(receiver)
+                failed.append(receiver)
+        
+        # Close the removed connections, so their endpoints exit and run their cleanup
+        # (which tolerates the stream being gone by then) instead of staying open
+        # outside every group
+        if failed:
+            await asyncio.gather(
+                *(asyncio.wait_for(receiver.close(code=1011, reason="Send failed"), FRAME_SEND_TIMEOUT)
+                  for receiver in failed),
+                return_exceptions=True
+            )
+    
+    @app.on_event("startup")
+    async def log_event_loop():
+        """Log which event loop serves the app, to confirm the uvloop policy took effect"""
+        loop = asyncio.get_running_loop()
+        logger.info(f"WebSocket server running on {type(loop).__module__}.{type(loop).__name__}")
+    
+    async def reap_idle_streams():
+        """Periodically evict streams that lost their broadcasters and stopped receiving frames"""
+        while True:
+            await asyncio.sleep(STREAM_REAP_INTERVAL)
+            now = time.monotonic()
+            for stream_id, stream in list(streams.items()):
+                connections = active_connections.get(stream_id)
+                if connections and connections["broadcasters"]:
+                    continue
+                if now - stream.last_activity < STREAM_IDLE_TIMEOUT:
+                    continue
+                
+                stream.worker.cancel()
+                del streams[stream_id]
+                if connections is not None and not connections["viewers"]:
+                    del active_connections[stream_id]
+                logger.info(f"Evicted stream {stream_id} after {now - stream.last_activity:.0f}s idle")
+    
+    @app.on_event("startup")
+    async def start_stream_reaper():
+        """Start the idle stream reaper on the serving event loop"""
+        app.state.stream_reaper = asyncio.create_task(reap_idle_streams())
     
     # Use the pre-initialized global processors
     logger.info(f"WebSocket server using pre-initialized processors: {list(global_processors.keys())}")
@@ -178,573 +353,619 @@ def websocket_server():
         websocket: WebSocket, 
         client_type: str, 
         stream_id: str,
-        processor_type: str = Query("lightning", description="Processor type: 'standard' or 'lightning'")
+        processor_type: str = Query(DEFAULT_PROCESSOR_TYPE, description="Processor type, one of those listed by /processors"),
+        binary: bool = Query(False, description="Receive processed frames as binary JPEG messages")
     ):
         # Validate processor type
         if processor_type not in global_processors:
-            logger.warning(f"Invalid processor type: {processor_type}, using standard")
-            processor_type = "standard"
+            fallback_processor_type = next(iter(global_processors))
+            logger.warning(f"Invalid processor type: {processor_type}, using {fallback_processor_type}")
+            processor_type = fallback_processor_type
                 
         logger.info(f"Using {processor_type} processor for stream {stream_id}")
         
         await websocket.accept()
         
-        # Initialize connections for this stream
-        if stream_id not in active_connections:
-            active_connections[stream_id] = {"broadcasters": [], "viewers": [], "broadcaster_viewers": []}
-        elif "broadcaster_viewers" not in active_connections[stream_id]:
-            active_connections[stream_id]["broadcaster_viewers"] = []
+        try:
+            if binary:
+                binary_clients.add(websocket)
+        
+            # Initialize connections for this stream
+            if stream_id not in active_connections:
+                active_connections[stream_id] = {"broadcasters": set(), "viewers": set(), "broadcaster_viewers": set()}
+            elif "broadcaster_viewers" not in active_connections[stream_id]:
+                active_connections[stream_id]["broadcaster_viewers"] = set()
         
-        # Add this connection to the right group
-        if client_type == "broadcaster":
-            active_connections[stream_id]["broadcasters"].append(websocket)
-            logger.info(f"Broadcaster connected to stream {stream_id}")
+            # Add this connection to the right group
+            if client_type == "broadcaster":
+                active_connections[stream_id]["broadcasters"].add(websocket)
+                broadcaster_clients.add(websocket)
+                logger.info(f"Broadcaster connected to stream {stream_id}")
             
-            # Initialize stream data
-            if stream_id not in streams:
-                streams[stream_id] = {
-                    "processing": False,
-                    "latest_frame": None,
-                    "latest_processed_frame": None,  # Store the latest processed frame for new viewers
-                    "style_prompt": DEFAULT_STYLE_PROMPT,
-                    "negative_prompt": "ugly, deformed, disfigured, poor details, bad anatomy",
-                    "processor_type": processor_type,
-                    "strength": 0.9,  # Add default strength parameter
-                    "stream_ended": False  # Add a flag to track if the stream has been explicitly ended
-                }
-            else:
-                # Update processor type for existing stream
-                streams[stream_id]["processor_type"] = processor_type
+                # Initialize stream data
+                if stream_id not in streams:
+                    streams[stream_id] = Stream(
+                        processor_type=processor_type,
+                        processor=global_processors[processor_type]
+                    )
+                    streams[stream_id].worker = asyncio.create_task(stream_worker(stream_id))
+                else:
+                    # Update processor type for existing stream
+                    streams[stream_id].processor_type = processor_type
+                    streams[stream_id].processor = global_processors[processor_type]
                 
-            # Notify broadcaster of selected processor type
-            await websocket.send_json({
-                "type": "processor_info",
-                "processor_type": processor_type,
-                "message": f"Using {processor_type} processor for image processing"
-            })
+                # Notify broadcaster of selected processor type
+                await send_json(websocket, {
+                    "type": "processor_info",
+                    "processor_type": processor_type,
+                    "message": f"Using {processor_type} processor for image processing"
+                })
             
-        elif client_type == "viewer":
-            active_connections[stream_id]["viewers"].append(websocket)
-            logger.info(f"Viewer connected to stream {stream_id}")
+            elif client_type == "viewer":
+                active_connections[stream_id]["viewers"].add(websocket)
+                logger.info(f"Viewer connected to stream {stream_id}")
             
-            # Immediately check if this stream is active
-            is_active = (
-                stream_id in streams and 
-                not streams[stream_id].get("stream_ended", False) and
-                any(active_connections[stream_id]["broadcasters"])
-            )
+                # Immediately check if this stream is active
+                is_active = (
+                    stream_id in streams and 
+                    not streams[stream_id].stream_ended and
+                    bool(active_connections[stream_id]["broadcasters"])
+                )
             
-            if not is_active:
-                # Stream doesn't exist or has ended - notify viewer immediately
-                logger.info(f"Viewer connected to non-active stream {stream_id}, notifying immediately")
-                await websocket.send_json({
-                    "type": "stream_status",
-                    "active": False,
-                    "ended": stream_id in streams and streams[stream_id].get("stream_ended", False),
-                    "message": "This stream is not currently active"
-                })
+                if not is_active:
+                    # Stream doesn't exist or has ended - notify viewer immediately
+                    logger.info(f"Viewer connected to non-active stream {stream_id}, notifying immediately")
+                    await send_json(websocket, {
+                        "type": "stream_status",
+                        "active": False,
+                        "ended": stream_id in streams and streams[stream_id].stream_ended,
+                        "message": "This stream is not currently active"
+                    })
             
-            # Send the current style prompt to new viewer
-            if stream_id in streams and "style_prompt" in streams[stream_id]:
-                current_prompt = streams[stream_id]["style_prompt"]
-                current_processor = streams[stream_id].get("processor_type", "standard")
+                # Send the current style prompt to new viewer
+                if stream_id in streams:
+                    current_prompt = streams[stream_id].style_prompt
+                    current_processor = streams[stream_id].processor_type
                 
-                await websocket.send_json({
-                    "type": "style_updated",
-                    "prompt": current_prompt,
-                    "processor_type": current_processor
-                })
-                logger.info(f"Sent current style prompt to new viewer for stream {stream_id}: '{current_prompt}'")
+                    await send_json(websocket, {
+                        "type": "style_updated",
+                        "prompt": current_prompt,
+                        "processor_type": current_processor
+                    })
+                    logger.info(f"Sent current style prompt to new viewer for stream {stream_id}: '{current_prompt}'")
                 
-                # If we have a recent processed frame, send it to the new viewer immediately
-                # BUT ONLY if the stream hasn't ended
-                if (is_active and
-                    "latest_processed_frame" in streams[stream_id] and 
-                    streams[stream_id]["latest_processed_frame"]):
-                    try:
-                        logger.info(f"Sending latest processed frame to new viewer for stream {stream_id}")
-                        
-                        current_strength = streams[stream_id].get("strength", 0.9)
-                        current_timestamp_ms = int(time.time() * 1000)
+                    # If we have a recent processed frame, send it to the new viewer immediately
+                    # BUT ONLY if the stream hasn't ended
+                    if is_active and streams[stream_id].latest_processed_frame:
+                        try:
+                            logger.info(f"Sending latest processed frame to new viewer for stream {stream_id}")
                         
-                        await websocket.send_json({
-                            "type": "frame",
-                            "streamId": stream_id,
-                            "frame": streams[stream_id]["latest_processed_frame"],
-                            "timestamp": current_timestamp_ms,
-                            "is_original": False,
-                            "processor_type": current_processor,
-                            "processed": True,
-                            "style_prompt": current_prompt,
-                            "strength": current_strength
-                        })
-                        logger.info(f"Successfully sent latest processed frame to new viewer for stream {stream_id}")
-                    except Exception as e:
-                        logger.error(f"Error sending latest frame to new viewer: {e}")
-        else:
-            await websocket.close(code=1008, reason="Invalid client type")
-            return
+                            meta_payload = build_frame_meta(stream_id, is_original=False, processor_type=current_processor)
+                            if websocket in binary_clients and streams[stream_id].latest_processed_bytes:
+                                frame = build_frame_binary(streams[stream_id].latest_processed_bytes)
+                            else:
+                                frame = build_frame_payload(stream_id, streams[stream_id].latest_processed_frame)
+                            # Through the viewer's sender task, so frames only ever have one writer per socket
+                            queue_frame_send(
+                                websocket,
+                                active_connections[stream_id]["viewers"],
+                                partial(send_frame, websocket, meta_payload, frame)
+                            )
+                            logger.info(f"Queued latest processed frame for new viewer of stream {stream_id}")
+                        except Exception as e:
+                            logger.error(f"Error sending latest frame to new viewer: {e}")
+            else:
+                await websocket.close(code=1008, reason="Invalid client type")
+                return
             
-        try:
             while True:
-                with logger.span("websocket_receive"):
-                    data = await websocket.receive_json()
+                data = await receive_message(websocket)
+                
+                # Binary messages carry raw JPEG frames from the broadcaster, without
+                # the base64 and JSON overhead of frame messages
+                if isinstance(data, bytes):
+                    if client_type == "broadcaster":
+                        await queue_frame(websocket, stream_id, data)
+                    continue
+                
+                if "type" not in data:
+                    await send_json(websocket, {"error": "Invalid message format"})
+                    continue
+                
+                if data["type"] == "frame" and client_type == "broadcaster":
+                    # Get frame data
+                    frame = data.get("frame", "")
                     
-                    if "type" not in data:
-                        await websocket.send_json({"error": "Invalid message format"})
-                        continue
+                    # Check if it's a data URL and extract the base64 part if needed
+                    if isinstance(frame, str) and frame.startswith('data:'):
+                        try:
+                            # Extract the actual base64 content
+                            frame = frame.split(',', 1)[1]
+                            logger.debug(f"Extracted base64 data from data URL for stream {stream_id}")
+                        except IndexError:
+                            logger.warning(f"Invalid data URL format for stream {stream_id}")
+                            await send_json(websocket, {
+                                "type": "error",
+                                "message": "Invalid data URL format"
+                            })
+                            continue
                     
-                    if data["type"] == "frame" and client_type == "broadcaster":
-                        with logger.span("process_frame"):
-                            # Get frame data
-                            frame = data.get("frame", "")
-                            
-                            # Validate frame data
-                            if not frame:
-                                logger.warning(f"Empty frame data received for stream {stream_id}")
-                                await websocket.send_json({
-                                    "type": "error",
-                                    "message": "Empty frame data received"
-                                })
-                                continue
-                            
-                            # Check if it's a data URL and extract the base64 part if needed
-                            if isinstance(frame, str) and frame.startswith('data:'):
-                                try:
-                                    # Extract the actual base64 content
-                                    frame = frame.split(',', 1)[1]
-                                    logger.debug(f"Extracted base64 data from data URL for stream {stream_id}")
-                                except IndexError:
-                                    logger.warning(f"Invalid data URL format for stream {stream_id}")
-                                    await websocket.send_json({
-                                        "type": "error",
-                                        "message": "Invalid data URL format"
-                                    })
-                                    continue
+                    await queue_frame(websocket, stream_id, frame)
+                
+                # Handle prompt updates from broadcaster
+                elif data["type"] == "update_prompt" and client_type == "broadcaster":
+                    with logger.span("update_prompt") as prompt_span:
+                        new_prompt = data.get("prompt", "")
+                        
+                        if not new_prompt:
+                            logger.warning(f"Empty prompt received for stream {stream_id}")
+                            await send_json(websocket, {
+                                "type": "error",
+                                "message": "Empty prompt received"
+                            })
+                            continue
+                        
+                        # Update the prompt for this stream
+                        if stream_id in streams:
+                            old_prompt = streams[stream_id].style_prompt
+                            streams[stream_id].style_prompt = new_prompt
+                            logger.info(f"Updated prompt for stream {stream_id}: '{old_prompt}' -> '{new_prompt}'")
                             
-                              # Check frame size (Modal has a 2MB limit on WebSocket messages)
-                            frame_size_mb = len(frame) / (1024 * 1024)
-                            if frame_size_mb > 1.9:  # Leave some margin below 2MB
-                                logger.warning(f"Frame size too large: {frame_size_mb:.2f}MB, max allowed is 1.9MB")
-                                await websocket.send_json({
-                                    "type": "error",
-                                    "message": f"Frame size too large: {frame_size_mb:.2f}MB, max allowed is 1.9MB"
-                                })
-                                continue
-                                
-                            # Always store the latest frame
-                            streams[stream_id]["latest_frame"] = frame
+                            # Confirm to the broadcaster
+                            await send_json(websocket, {
+                                "type": "prompt_updated",
+                                "prompt": new_prompt
+                            })
                             
-                            # Process frame if not already processing
-                            if not streams[stream_id]["processing"]:
-                                # Mark as processing
-                                streams[stream_id]["processing"] = True
-                                
-                                # Get the appropriate processor
-                                current_processor_type = streams[stream_id].get("processor_type", "standard")
-                                processor = global_processors[current_processor_type]
-                                
-                                logger.info(f"Starting to process frame for stream {stream_id}")
-                                
-                                # Process frame asynchronously
-                                asyncio.create_task(
-                                    process_and_broadcast_frame(
-                                        stream_id, 
-                                        streams[stream_id]["latest_frame"],  
-                                        active_connections[stream_id]["viewers"],
-                                        processor,
-                                        current_processor_type
-                                    )
-                                )
-                            else:
-                                # Already processing - just store the latest frame and notify the client
-                                # that this frame will be processed when current processing completes
-                                await websocket.send_json({
-                                    "type": "frame_skipped",
-                                    "message": "A frame is already being processed - this frame will be processed next if it's still the latest"
-                                })
-                                logger.info(f"Received frame for stream {stream_id} - stored as latest frame, will be processed after current frame")
+                            # Also notify viewers about the style change
+                            await broadcast_json(active_connections[stream_id]["viewers"], {
+                                "type": "style_updated",
+                                "prompt": new_prompt
+                            }, "style update")
+                
+                # Handle processor type updates from broadcaster
+                elif data["type"] == "update_processor" and client_type == "broadcaster":
+                    with logger.span("update_processor") as processor_span:
+                        new_processor_type = data.get("processor_type", DEFAULT_PROCESSOR_TYPE)
+                        
+                        # Validate processor type
+                        if new_processor_type not in global_processors:
+                            logger.warning(f"Invalid processor type: {new_processor_type}")
+                            await send_json(websocket, {
+                                "type": "error",
+                                "message": f"Invalid processor type: {new_processor_type}"
+                            })
+                            continue
                     
-                    # Handle prompt updates from broadcaster
-                    elif data["type"] == "update_prompt" and client_type == "broadcaster":
-                        with logger.span("update_prompt") as prompt_span:
-                            new_prompt = data.get("prompt", "")
-                            
-                            if not new_prompt:
-                                logger.warning(f"Empty prompt received for stream {stream_id}")
-                                await websocket.send_json({
-                                    "type": "error",
-                                    "message": "Empty prompt received"
-                                })
-                                continue
+                        
+                        # Update the processor type for this stream
+                        if stream_id in streams:
+                            old_processor_type = streams[stream_id].processor_type
+                            streams[stream_id].processor_type = new_processor_type
+                            streams[stream_id].processor = global_processors[new_processor_type]
+                            logger.info(f"Updated processor type for stream {stream_id}: '{old_processor_type}' -> '{new_processor_type}'")
                             
-                            # Update the prompt for this stream
-                            if stream_id in streams:
-                                old_prompt = streams[stream_id]["style_prompt"]
-                                streams[stream_id]["style_prompt"] = new_prompt
-                                logger.info(f"Updated prompt for stream {stream_id}: '{old_prompt}' -> '{new_prompt}'")
-                                
-                                # Confirm to the broadcaster
-                                await websocket.send_json({
-                                    "type": "prompt_updated",
-                                    "prompt": new_prompt
-                                })
-                                
-                                # Also notify viewers about the style change
-                                for viewer in active_connections[stream_id]["viewers"]:
-                                    try:
-                                        await viewer.send_json({
-                                            "type": "style_updated",
-                                            "prompt": new_prompt
-                                        })
-                                    except Exception as e:
-                                        logger.error(f"Error notifying viewer of style update: {e}")
-                    
-                    # Handle processor type updates from broadcaster
-                    elif data["type"] == "update_processor" and client_type == "broadcaster":
-                        with logger.span("update_processor") as processor_span:
-                            new_processor_type = data.get("processor_type", "standard")
+                            # Confirm to the broadcaster
+                            await send_json(websocket, {
+                                "type": "processor_updated",
+                                "processor_type": new_processor_type
+                            })
                             
-                            # Validate processor type
-                            if new_processor_type not in global_processors:
-                                logger.warning(f"Invalid processor type: {new_processor_type}")
-                                await websocket.send_json({
-                                    "type": "error",
-                                    "message": f"Invalid processor type: {new_processor_type}"
-                                })
-                                continue
+                            # Also notify viewers about the processor change
+                            await broadcast_json(active_connections[stream_id]["viewers"], {
+                                "type": "processor_updated",
+                                "processor_type": new_processor_type
+                            }, "processor update")
+                
+                # Handle negative prompt updates from broadcaster
+                elif data["type"] == "update_negative_prompt" and client_type == "broadcaster":
+                    with logger.span("update_negative_prompt") as neg_prompt_span:
+                        new_negative_prompt = data.get("negative_prompt", "")
                         
+                        # Update the negative prompt for this stream
+                        if stream_id in streams:
+                            old_negative_prompt = streams[stream_id].negative_prompt
+                            streams[stream_id].negative_prompt = new_negative_prompt
+                            logger.info(f"Updated negative prompt for stream {stream_id}: '{old_negative_prompt}' -> '{new_negative_prompt}'")
                             
-                            # Update the processor type for this stream
-                            if stream_id in streams:
-                                old_processor_type = streams[stream_id].get("processor_type", "standard")
-                                streams[stream_id]["processor_type"] = new_processor_type
-                                logger.info(f"Updated processor type for stream {stream_id}: '{old_processor_type}' -> '{new_processor_type}'")
-                                
-                                # Confirm to the broadcaster
-                                await websocket.send_json({
-                                    "type": "processor_updated",
-                                    "processor_type": new_processor_type
-                                })
-                                
-                                # Also notify viewers about the processor change
-                                for viewer in active_connections[stream_id]["viewers"]:
-                                    try:
-                                        await viewer.send_json({
-                                            "type": "processor_updated",
-                                            "processor_type": new_processor_type
-                                        })
-                                    except Exception as e:
-                                        logger.error(f"Error notifying viewer of processor update: {e}")
-                    
-                    # Handle negative prompt updates from broadcaster
-                    elif data["type"] == "update_negative_prompt" and client_type == "broadcaster":
-                        with logger.span("update_negative_prompt") as neg_prompt_span:
-                            new_negative_prompt = data.get("negative_prompt", "")
+                            # Confirm to the broadcaster
+                            await send_json(websocket, {
+                                "type": "negative_prompt_updated",
+                                "negative_prompt": new_negative_prompt
+                            })
                             
-                            # Update the negative prompt for this stream
-                            if stream_id in streams:
-                                old_negative_prompt = streams[stream_id].get("negative_prompt", "")
-                                streams[stream_id]["negative_prompt"] = new_negative_prompt
-                                logger.info(f"Updated negative prompt for stream {stream_id}: '{old_negative_prompt}' -> '{new_negative_prompt}'")
-                                
-                                # Confirm to the broadcaster
-                                await websocket.send_json({
-                                    "type": "negative_prompt_updated",
-                                    "negative_prompt": new_negative_prompt
-                                })
-                                
-                                # Also notify viewers about the negative prompt change
-                                for viewer in active_connections[stream_id]["viewers"]:
-                                    try:
-                                        await viewer.send_json({
-                                            "type": "negative_prompt_updated",
-                                            "negative_prompt": new_negative_prompt
-                                        })
-                                    except Exception as e:
-                                        logger.error(f"Error notifying viewer of negative prompt update: {e}")
-                    
-                    # Handle strength parameter updates from broadcaster
-                    elif data["type"] == "update_strength" and client_type == "broadcaster":
-                        with logger.span("update_strength") as strength_span:
-                            try:
-                                new_strength = float(data.get("strength", 0.9))
-                                # Validate strength is within valid range
-                                if not (0.1 <= new_strength <= 1.0):
-                                    raise ValueError(f"Strength must be between 0.1 and 1.0, got {new_strength}")
-                                
-                                # Update the strength for this stream
-                                if stream_id in streams:
-                                    old_strength = streams[stream_id].get("strength", 0.9)
-                                    streams[stream_id]["strength"] = new_strength
-                                    logger.info(f"Updated strength for stream {stream_id}: {old_strength} -> {new_strength}")
-                                    
-                                    # Confirm to the broadcaster
-                                    await websocket.send_json({
-                                        "type": "strength_updated",
-                                        "strength": new_strength
-                                    })
-                                    
-                                    # Also notify viewers about the strength change
-                                    for viewer in active_connections[stream_id]["viewers"]:
-                                        try:
-                                            await viewer.send_json({
-                                                "type": "strength_updated",
-                                                "strength": new_strength
-                                            })
-                                        except Exception as e:
-                                            logger.error(f"Error notifying viewer of strength update: {e}")
-                            except (ValueError, TypeError) as e:
-                                logger.warning(f"Invalid strength value: {e}")
-                                await websocket.send_json({
-                                    "type": "error",
-                                    "message": f"Invalid strength value: {e}"
-                                })
-                    
-                    # Handle explicit stream ending from broadcaster
-                    elif data["type"] == "end_stream" and client_type == "broadcaster":
-                        with logger.span("end_stream") as end_span:
+                            # Also notify viewers about the negative prompt change
+                            await broadcast_json(active_connections[stream_id]["viewers"], {
+                                "type": "negative_prompt_updated",
+                                "negative_prompt": new_negative_prompt
+                            }, "negative prompt update")
+                
+                # Handle strength parameter updates from broadcaster
+                elif data["type"] == "update_strength" and client_type == "broadcaster":
+                    with logger.span("update_strength") as strength_span:
+                        try:
+                            new_strength = float(data.get("strength", 0.9))
+                            # Validate strength is within valid range
+                            if not (0.1 <= new_strength <= 1.0):
+                                raise ValueError(f"Strength must be between 0.1 and 1.0, got {new_strength}")
+                            
+                            # Update the strength for this stream
                             if stream_id in streams:
-                                # Mark the stream as ended
-                                streams[stream_id]["stream_ended"] = True
-                                # Clear the latest frame to prevent it from being sent to new viewers
-                                streams[stream_id]["latest_processed_frame"] = None
-                                logger.info(f"Broadcaster explicitly ended stream {stream_id}")
+                                old_strength = streams[stream_id].strength
+                                streams[stream_id].strength = new_strength
+                                logger.info(f"Updated strength for stream {stream_id}: {old_strength} -> {new_strength}")
                                 
                                 # Confirm to the broadcaster
-                                await websocket.send_json({
-                                    "type": "stream_ended_confirmation",
-                                    "message": "Stream ended successfully"
+                                await send_json(websocket, {
+                                    "type": "strength_updated",
+                                    "strength": new_strength
                                 })
                                 
-                                # Notify all viewers that the stream has ended
-                                for viewer in active_connections[stream_id]["viewers"]:
-                                    try:
-                                        logger.info(f"Notifying viewer that stream {stream_id} has been explicitly ended")
-                                        await viewer.send_json({
-                                            "type": "stream_ended",
-                                            "streamId": stream_id,
-                                            "message": "The broadcaster has ended this stream"
-                                        })
-                                    except Exception as e:
-                                        logger.error(f"Error notifying viewer of explicit stream end: {e}")
-                    
-                    elif data["type"] == "ping":
-                        with logger.span("ping"):
-                            await websocket.send_json({"type": "pong"})
-                    
-                    # Handle request for current style prompt
-                    elif data["type"] == "get_style_prompt" and client_type == "viewer":
-                        with logger.span("get_style_prompt") as style_span:
-                            if stream_id in streams and "style_prompt" in streams[stream_id]:
-                                current_prompt = streams[stream_id]["style_prompt"]
-                                await websocket.send_json({
-                                    "type": "style_updated",
-                                    "prompt": current_prompt
-                                })
-                                logger.info(f"Sent current style prompt in response to request for stream {stream_id}: '{current_prompt}'")
-                    
-                    # Handle request for processor info
-                    elif data["type"] == "get_processor_info":
-                        with logger.span("get_processor_info") as info_span:
-                            if stream_id in streams and "processor_type" in streams[stream_id]:
-                                current_processor = streams[stream_id]["processor_type"]
-                                await websocket.send_json({
-                                    "type": "processor_info",
-                                    "processor_type": current_processor
-                                })
-                                logger.info(f"Sent processor info in response to request for stream {stream_id}: '{current_processor}'")
-                    
-                    # Handle request for latest processed frame from broadcaster
-                    elif data["type"] == "get_latest_frame" and client_type == "broadcaster":
-                        with logger.span("get_latest_frame") as frame_span:
-                            if stream_id in streams and streams[stream_id].get("stream_ended", False):
-                                # Don't return frames for ended streams
-                                logger.info(f"Not sending frame for ended stream {stream_id}")
-                                await websocket.send_json({
-                                    "type": "stream_ended",
-                                    "message": "This stream has ended"
-                                })
-                            elif stream_id in streams and streams[stream_id].get("latest_processed_frame"):
-                                logger.info(f"Sending latest processed frame to broadcaster for stream {stream_id}")
-                                await websocket.send_json({
-                                    "type": "latest_frame",
-                                    "frame": streams[stream_id]["latest_processed_frame"]
-                                })
-                            else:
-                                logger.info(f"No processed frame available yet for stream {stream_id}")
-                                await websocket.send_json({
-                                    "type": "latest_frame",
-                                    "frame": None,
-                                    "message": "No processed frame available yet"
-                                })
-                                
-                    # Handle request to subscribe to processed frames
-                    elif data["type"] == "subscribe_to_processed_frames" and client_type == "broadcaster":
-                        with logger.span("subscribe_to_processed") as sub_span:
-                            # Add this broadcaster to a special list that will receive processed frames
-                            if stream_id not in active_connections:
-                                active_connections[stream_id] = {"broadcasters": [], "viewers": [], "broadcaster_viewers": []}
-                            elif "broadcaster_viewers" not in active_connections[stream_id]:
-                                active_connections[stream_id]["broadcaster_viewers"] = []
-                                
-                            active_connections[stream_id]["broadcaster_viewers"].append(websocket)
-                            logger.info(f"Broadcaster for stream {stream_id} subscribed to processed frames")
+                                # Also notify viewers about the strength change
+                                await broadcast_json(active_connections[stream_id]["viewers"], {
+                                    "type": "strength_updated",
+                                    "strength": new_strength
+                                }, "strength update")
+                        except (ValueError, TypeError) as e:
+                            logger.warning(f"Invalid strength value: {e}")
+                            await send_json(websocket, {
+                                "type": "error",
+                                "message": f"Invalid strength value: {e}"
+                            })
+                
+                # Handle explicit stream ending from broadcaster
+                elif data["type"] == "end_stream" and client_type == "broadcaster":
+                    with logger.span("end_stream") as end_span:
+                        if stream_id in streams:
+                            # Mark the stream as ended
+                            streams[stream_id].stream_ended = True
+                            # Clear the latest frame to prevent it from being sent to new viewers
+                            streams[stream_id].latest_processed_frame = None
+                            streams[stream_id].latest_processed_bytes = None
+                            logger.info(f"Broadcaster explicitly ended stream {stream_id}")
                             
-                            await websocket.send_json({
-                                "type": "subscription_confirmed",
-                                "message": "You will now receive processed frames"
+                            # Confirm to the broadcaster
+                            await send_json(websocket, {
+                                "type": "stream_ended_confirmation",
+                                "message": "Stream ended successfully"
                             })
-                    
-                    # Handle request to unsubscribe from processed frames
-                    elif data["type"] == "unsubscribe_from_processed_frames" and client_type == "broadcaster":
-                        with logger.span("unsubscribe_from_processed") as unsub_span:
-                            if (stream_id in active_connections and 
-                                "broadcaster_viewers" in active_connections[stream_id] and
-                                websocket in active_connections[stream_id]["broadcaster_viewers"]):
-                                
-                                active_connections[stream_id]["broadcaster_viewers"].remove(websocket)
-                                logger.info(f"Broadcaster for stream {stream_id} unsubscribed from processed frames")
-                                
-                                await websocket.send_json({
-                                    "type": "unsubscription_confirmed",
-                                    "message": "You will no longer receive processed frames"
-                                })
-
-                    # Handle check_stream_status requests from viewers or broadcasters
-                    elif data["type"] == "check_stream_status":
-                        with logger.span("check_stream_status") as status_span:
-                            requested_stream_id = data.get("streamId", stream_id)
                             
-                            # Check if stream exists in our streams dictionary
-                            stream_exists = requested_stream_id in streams
+                            # Notify all viewers that the stream has ended
+                            logger.info(f"Notifying viewers that stream {stream_id} has been explicitly ended")
+                            await broadcast_json(active_connections[stream_id]["viewers"], {
+                                "type": "stream_ended",
+                                "streamId": stream_id,
+                                "message": "The broadcaster has ended this stream"
+                            }, "explicit stream end")
+                
+                # Keepalives are the most frequent control message: no span
+                elif data["type"] == "ping":
+                    await send_json(websocket, {"type": "pong"})
+                
+                # Handle request for current style prompt
+                elif data["type"] == "get_style_prompt" and client_type == "viewer":
+                    with logger.span("get_style_prompt") as style_span:
+                        if stream_id in streams:
+                            current_prompt = streams[stream_id].style_prompt
+                            await send_json(websocket, {
+                                "type": "style_updated",
+                                "prompt": current_prompt
+                            })
+                            logger.info(f"Sent current style prompt in response to request for stream {stream_id}: '{current_prompt}'")
+                
+                # Handle request for processor info
+                elif data["type"] == "get_processor_info":
+                    with logger.span("get_processor_info") as info_span:
+                        if stream_id in streams:
+                            current_processor = streams[stream_id].processor_type
+                            await send_json(websocket, {
+                                "type": "processor_info",
+                                "processor_type": current_processor
+                            })
+                            logger.info(f"Sent processor info in response to request for stream {stream_id}: '{current_processor}'")
+                
+                # Handle request for latest processed frame from broadcaster
+                elif data["type"] == "get_latest_frame" and client_type == "broadcaster":
+                    with logger.span("get_latest_frame") as frame_span:
+                        if stream_id in streams and streams[stream_id].stream_ended:
+                            # Don't return frames for ended streams
+                            logger.info(f"Not sending frame for ended stream {stream_id}")
+                            await send_json(websocket, {
+                                "type": "stream_ended",
+                                "message": "This stream has ended"
+                            })
+                        elif stream_id in streams and streams[stream_id].latest_processed_frame:
+                            logger.debug(f"Sending latest processed frame to broadcaster for stream {stream_id}")
+                            await send_json(websocket, {
+                                "type": "latest_frame",
+                                "frame": streams[stream_id].latest_processed_frame,
+                                "frame_encoding": FRAME_ENCODING
+                            })
+                        else:
+                            logger.debug(f"No processed frame available yet for stream {stream_id}")
+                            await send_json(websocket, {
+                                "type": "latest_frame",
+                                "frame": None,
+                                "message": "No processed frame available yet"
+                            })
                             
-                            # If the stream exists, check if it's explicitly marked as ended
-                            stream_ended = False
-                            if stream_exists:
-                                stream_ended = streams[requested_stream_id].get("stream_ended", False)
+                # Handle request to subscribe to processed frames
+                elif data["type"] == "subscribe_to_processed_frames" and client_type == "broadcaster":
+                    with logger.span("subscribe_to_processed") as sub_span:
+                        # Add this broadcaster to a special list that will receive processed frames
+                        if stream_id not in active_connections:
+                            active_connections[stream_id] = {"broadcasters": set(), "viewers": set(), "broadcaster_viewers": set()}
+                        elif "broadcaster_viewers" not in active_connections[stream_id]:
+                            active_connections[stream_id]["broadcaster_viewers"] = set()
                             
-                            # Check if stream is active (has broadcasters and exists in streams dictionary and not explicitly ended)
-                            is_active = (
-                                requested_stream_id in active_connections and
-                                stream_exists and
-                                not stream_ended and
-                                len(active_connections[requested_stream_id]["broadcasters"]) > 0
-                            )
+                        active_connections[stream_id]["broadcaster_viewers"].add(websocket)
+                        logger.info(f"Broadcaster for stream {stream_id} subscribed to processed frames")
+                        
+                        await send_json(websocket, {
+                            "type": "subscription_confirmed",
+                            "message": "You will now receive processed frames"
+                        })
+                
+                # Handle request to unsubscribe from processed frames
+                elif data["type"] == "unsubscribe_from_processed_frames" and client_type == "broadcaster":
+                    with logger.span("unsubscribe_from_processed") as unsub_span:
+                        if (stream_id in active_connections and 
+                            "broadcaster_viewers" in active_connections[stream_id] and
+                            websocket in active_connections[stream_id]["broadcaster_viewers"]):
                             
-                            logger.info(f"Stream status check for {requested_stream_id}: active={is_active}, ended={stream_ended}")
+                            active_connections[stream_id]["broadcaster_viewers"].discard(websocket)
+                            stop_frame_sender(websocket)
+                            logger.info(f"Broadcaster for stream {stream_id} unsubscribed from processed frames")
                             
-                            # Send stream status response with extended information
-                            await websocket.send_json({
-                                "type": "stream_status",
-                                "streamId": requested_stream_id,
-                                "active": is_active,
-                                "ended": stream_ended,
-                                "message": "Stream is active" if is_active else ("Stream has ended" if stream_ended else "Stream is not active")
+                            await send_json(websocket, {
+                                "type": "unsubscription_confirmed",
+                                "message": "You will no longer receive processed frames"
                             })
+
+                # Handle check_stream_status requests from viewers or broadcasters
+                elif data["type"] == "check_stream_status":
+                    with logger.span("check_stream_status") as status_span:
+                        requested_stream_id = data.get("streamId", stream_id)
+                        
+                        # Check if stream exists in our streams dictionary
+                        stream_exists = requested_stream_id in streams
+                        
+                        # If the stream exists, check if it's explicitly marked as ended
+                        stream_ended = False
+                        if stream_exists:
+                            stream_ended = streams[requested_stream_id].stream_ended
+                        
+                        # Check if stream is active (has broadcasters and exists in streams dictionary and not explicitly ended)
+                        is_active = (
+                            requested_stream_id in active_connections and
+                            stream_exists and
+                            not stream_ended and
+                            len(active_connections[requested_stream_id]["broadcasters"]) > 0
+                        )
+                        
+                        logger.info(f"Stream status check for {requested_stream_id}: active={is_active}, ended={stream_ended}")
+                        
+                        # Send stream status response with extended information
+                        await send_json(websocket, {
+                            "type": "stream_status",
+                            "streamId": requested_stream_id,
+                            "active": is_active,
+                            "ended": stream_ended,
+                            "message": "Stream is active" if is_active else ("Stream has ended" if stream_ended else "Stream is not active")
+                        })
         except WebSocketDisconnect:
-            # Remove connection on disconnect
-            if client_type == "broadcaster":
-                active_connections[stream_id]["broadcasters"].remove(websocket)
-                
-                # Also remove from broadcaster_viewers if present
-                if "broadcaster_viewers" in active_connections[stream_id] and websocket in active_connections[stream_id]["broadcaster_viewers"]:
-                    active_connections[stream_id]["broadcaster_viewers"].remove(websocket)
-                    
-                logger.info(f"Broadcaster disconnected from stream {stream_id}")
+            pass
+        finally:
+            # Runs however the connection ends, so a socket that errored out or sent
+            # a malformed message doesn't stay registered
+            binary_clients.discard(websocket)
+            broadcaster_clients.discard(websocket)
+            frame_meta_sent.pop(websocket, None)
+            stop_frame_sender(websocket)
+            await remove_connection(websocket, client_type, stream_id)
+    
+    async def remove_connection(websocket, client_type, stream_id):
+        """Remove a closed connection from its stream, ending the stream with its last broadcaster"""
+        # Another connection's cleanup may already have removed this stream
+        conns = active_connections.get(stream_id)
+        if conns is None:
+            return
+        stream = streams.get(stream_id)
+        if client_type == "broadcaster":
+            conns["broadcasters"].discard(websocket)
+            
+            # Also remove from broadcaster_viewers if present
+            if "broadcaster_viewers" in conns:
+                conns["broadcaster_viewers"].discard(websocket)
                 
-                # Check if this was the last broadcaster for this stream
-                if len(active_connections[stream_id]["broadcasters"]) == 0:
-                    # Mark the stream as ended
-                    if stream_id in streams:
-                        streams[stream_id]["stream_ended"] = True
-                        # Clear the latest frame to prevent it from being sent to new viewers
-                        streams[stream_id]["latest_processed_frame"] = None
-                        logger.info(f"Marked stream {stream_id} as ended")
-                    
-                    # Notify all viewers that the stream has ended
-                    for viewer in active_connections[stream_id]["viewers"]:
-                        try:
-                            logger.info(f"Notifying viewer that stream {stream_id} has ended")
-                            await viewer.send_json({
-                                "type": "stream_ended",
-                                "streamId": stream_id,
-                                "message": "The broadcaster has ended this stream"
-                            })
-                        except Exception as e:
-                            logger.error(f"Error notifying viewer of stream end: {e}")
-            else:
-                active_connections[stream_id]["viewers"].remove(websocket)
-                logger.info(f"Viewer disconnected from stream {stream_id}")
+            logger.info(f"Broadcaster disconnected from stream {stream_id}")
+            
+            # Check if this was the last broadcaster for this stream
+            if len(conns["broadcasters"]) == 0:
+                # Mark the stream as ended
+                if stream:
+                    stream.stream_ended = True
+                    # Clear the latest frame to prevent it from being sent to new viewers
+                    stream.latest_processed_frame = None
+                    stream.latest_processed_bytes = None
+                    logger.info(f"Marked stream {stream_id} as ended")
                 
-            # Clean up if no connections remain for this stream
-            if (len(active_connections[stream_id]["broadcasters"]) == 0 and 
-                len(active_connections[stream_id]["viewers"]) == 0):
-                del active_connections[stream_id]
-                if stream_id in streams:
-                    del streams[stream_id]
-                logger.info(f"Stream {stream_id} cleaned up")
+                # Notify all viewers that the stream has ended
+                logger.info(f"Notifying viewers that stream {stream_id} has ended")
+                await broadcast_json(conns["viewers"], {
+                    "type": "stream_ended",
+                    "streamId": stream_id,
+                    "message": "The broadcaster has ended this stream"
+                }, "stream end")
+        else:
+            conns["viewers"].discard(websocket)
+            logger.info(f"Viewer disconnected from stream {stream_id}")
+            
+        # Clean up if no connections remain for this stream
+        if (len(conns["broadcasters"]) == 0 and 
+            len(conns["viewers"]) == 0):
+            active_connections.pop(stream_id, None)
+            if stream:
+                stream.worker.cancel()
+                streams.pop(stream_id, None)
+            logger.info(f"Stream {stream_id} cleaned up")
+    
+    async def queue_frame(websocket, stream_id, frame):
+        """Make a received frame (base64 string or raw JPEG bytes) the next one to process"""
+        # Validate frame data
+        if not frame:
+            logger.warning(f"Empty frame data received for stream {stream_id}")
+            await send_json(websocket, {
+                "type": "error",
+                "message": "Empty frame data received"
+            })
+            return
+        
+        # Check frame size before anything is decoded. The limit is on the message as sent,
+        # so base64 frames are measured in characters, not the JPEG bytes they decode to.
+        frame_bytes = len(frame)
+        if frame_bytes > MAX_FRAME_BYTES:
+            frame_size_mb = frame_bytes / (1024 * 1024)
+            logger.warning(f"Frame size too large: {frame_size_mb:.2f}MB, max allowed is 1.9MB")
+            await send_json(websocket, {
+                "type": "error",
+                "message": f"Frame size too large: {frame_size_mb:.2f}MB, max allowed is 1.9MB"
+            })
+            return
+        
+        stream = streams[stream_id]
+        stream.last_activity = time.monotonic()
+        
+        # Replace the waiting frame, if any: older unprocessed frames are dropped
+        frame_queue = stream.frame_queue
+        if frame_queue.full():
+            frame_queue.get_nowait()
+        frame_queue.put_nowait(frame)
+        
+        if stream.processing:
+            # Already processing - notify the client that this frame will be
+            # processed when current processing completes
+            await send_json(websocket, {
+                "type": "frame_skipped",
+                "message": "A frame is already being processed - this frame will be processed next if it's still the latest"
+            })
+            logger.debug(f"Received frame for stream {stream_id} - stored as latest frame, will be processed after current frame")
+    
+    async def stream_worker(stream_id):
+        """Process the latest frame of a stream each time a new one arrives, one at a time"""
+        stream = streams[stream_id]
+        while True:
+            # Frames that arrived while the previous one was processing have replaced
+            # each other in the queue, so only the newest is processed
+            frame_data = await stream.frame_queue.get()
+            
+            # Snapshot the stream settings, so an update from the broadcaster mid-frame
+            # applies to the next frame instead of half of this one
+            current_processor_type = stream.processor_type
+            processor = stream.processor
+            current_prompt = stream.style_prompt
+            current_negative_prompt = stream.negative_prompt
+            current_strength = stream.strength
+            
+            logger.debug(f"Starting to process frame for stream {stream_id}")
+            stream.processing = True
+            try:
+                await process_and_broadcast_frame(
+                    stream_id,
+                    frame_data,
+                    active_connections[stream_id]["viewers"] if stream_id in active_connections else set(),
+                    processor,
+                    current_processor_type,
+                    current_prompt,
+                    current_negative_prompt,
+                    current_strength
+                )
+            except Exception as e:
+                # Keep the worker alive so the next frame is still processed
+                logger.error(f"Error in stream worker for stream {stream_id}: {e}")
+            finally:
+                stream.processing = False
     
-    async def process_and_broadcast_frame(stream_id, frame_data, viewers, processor, processor_type):
-        """Process a frame and broadcast to all viewers"""
+    async def process_and_broadcast_frame(stream_id, frame_data, viewers, processor, processor_type,
+                                          current_prompt, current_negative_prompt, current_strength):
+        """Process a frame with the given stream settings and broadcast to all viewers"""
         try:
             # We no longer send the original frame to viewers
             # Skip straight to processing the frame
             processing_start = asyncio.get_event_loop().time()
             
-            # Use the stream-specific prompt instead of hardcoded one
-            current_prompt = streams[stream_id]["style_prompt"]
-            current_strength = streams[stream_id].get("strength", 0.9)
+            logger.debug(f"Processing frame for stream {stream_id} with prompt: '{current_prompt}' using {processor_type} processor (strength: {current_strength})")
             
-            logger.info(f"Processing frame for stream {stream_id} with prompt: '{current_prompt}' using {processor_type} processor (strength: {current_strength})")
+            # Base64 frames are only decoded once they are picked up for processing, in a
+            # worker thread so a multi-megabyte decode doesn't stall other connections
+            if isinstance(frame_data, bytes):
+                frame_bytes = frame_data
+            else:
+                # validate=True: the string may be sent on to viewers as is (see
+                # build_frame_payload), so it must be pure base64
+                frame_bytes = await asyncio.to_thread(base64.b64decode, frame_data, validate=True)
             
             # Process the frame
-            processed_base64 = await process_base64_frame(
-                frame_data, 
+            processed_bytes = await process_bytes_frame(
+                frame_bytes, 
                 processor,
                 prompt=current_prompt,
-                negative_prompt=streams[stream_id].get("negative_prompt", None),
+                negative_prompt=current_negative_prompt,
                 strength=current_strength 
             )
             processing_time = asyncio.get_event_loop().time() - processing_start
             
-            logger.info(f"Frame for stream {stream_id} processed in {processing_time:.2f}s using {processor_type} processor (strength: {current_strength})")
+            # Looked up after processing: the stream may have been cleaned up meanwhile
+            stream = streams.get(stream_id)
+            conns = active_connections.get(stream_id)
+            
+            if stream:
+                stream.frame_count += 1
+                if stream.frame_count % FRAME_LOG_EVERY == 0:
+                    logger.info(f"Frame {stream.frame_count} for stream {stream_id} processed in {processing_time:.2f}s using {processor_type} processor (strength: {current_strength})")
+            
+            if processed_bytes is frame_bytes and isinstance(frame_data, str):
+                # Processing failed and handed back the input: reuse its base64 instead of re-encoding
+                processed_base64 = frame_data
+            else:
+                processed_base64 = await asyncio.to_thread(encode_frame, processed_bytes)
             
             # Store the processed frame for new viewers that join later
-            if processed_base64 and stream_id in streams:
-                if not processed_base64.startswith('data:'):
-                    processed_base64 = f"data:image/jpeg;base64,{processed_base64}"
-                streams[stream_id]["latest_processed_frame"] = processed_base64
-                logger.info(f"Stored latest processed frame for stream {stream_id}")
+            if stream:
+                stream.latest_processed_frame = processed_base64
+                stream.latest_processed_bytes = processed_bytes
+                logger.debug(f"Stored latest processed frame for stream {stream_id}")
             
             # Get the most up-to-date viewers list from active_connections
             current_viewers = viewers
-            if stream_id in active_connections and not viewers:
-                logger.info(f"Using viewers from active_connections for stream {stream_id}")
-                current_viewers = active_connections[stream_id]["viewers"]
+            if conns and not viewers:
+                logger.debug(f"Using viewers from active_connections for stream {stream_id}")
+                current_viewers = conns["viewers"]
             
-            # Only broadcast the processed frame to viewers
-            logger.info(f"Broadcasting PROCESSED frame to viewers for stream {stream_id} (using {len(current_viewers)} viewers)")
-            await broadcast_frame(
+            # Only broadcast the processed frame to viewers. The frame message is only
+            # serialized if a text receiver needs it, then shared with subscribed broadcasters
+            payload = await broadcast_frame(
                 stream_id, 
                 processed_base64, 
                 current_viewers, 
                 is_original=False,  # Explicitly mark as NOT original
-                processor_type=processor_type
+                processor_type=processor_type,
+                frame_bytes=processed_bytes
             )
             
             # Also broadcast to any broadcasters that subscribed to processed frames
-            if stream_id in active_connections and "broadcaster_viewers" in active_connections[stream_id]:
-                broadcaster_viewers = active_connections[stream_id]["broadcaster_viewers"]
+            if conns and "broadcaster_viewers" in conns:
+                broadcaster_viewers = conns["broadcaster_viewers"]
                 if broadcaster_viewers:
-                    logger.info(f"Broadcasting PROCESSED frame to {len(broadcaster_viewers)} subscribed broadcasters for stream {stream_id}")
                     try:
                         await broadcast_frame(
                             stream_id,
                             processed_base64,
                             broadcaster_viewers,
                             is_original=False,
-                            processor_type=processor_type
+                            processor_type=processor_type,
+                            payload=payload,
+                            frame_bytes=processed_bytes
                         )
                     except Exception as e:
                         logger.error(f"Error broadcasting to broadcaster viewers: {e}")
@@ -761,171 +982,230 @@ def websocket_server():
             if stream_id in active_connections:
                 current_viewers = active_connections[stream_id]["viewers"]
             
-            for viewer in current_viewers:
-                try:
-                    await viewer.send_json({
-                        "type": "error",
-                        "message": "Frame processing failed, please try again",
-                        "details": str(e)
-                    })
-                except Exception:
-                    pass
-        
-        finally:
-            # Reset processing flag
-            if stream_id in streams:
-                # Check if the latest frame is different from the one we just processed
-                latest_frame = streams[stream_id]["latest_frame"]
-                is_new_frame = latest_frame != frame_data
-                
-                if not is_new_frame:
-                    # No new frames arrived while we were processing
-                    streams[stream_id]["processing"] = False
-                    logger.info(f"Processing complete for stream {stream_id}, no new frames waiting")
-                else:
-                    # A new frame arrived while we were processing
-                    # Process the latest frame immediately
-                    logger.info(f"New frame arrived during processing - processing latest frame for stream {stream_id}")
-                    
-                    # Get the current processor type and processor
-                    current_processor_type = streams[stream_id].get("processor_type", processor_type)
-                    next_processor = global_processors[current_processor_type]
-                    
-                    # Get the most up-to-date viewers
-                    current_viewers = viewers
-                    if stream_id in active_connections:
-                        current_viewers = active_connections[stream_id]["viewers"]
-                    
-                    # Launch task to process the latest frame
-                    asyncio.create_task(
-                        process_and_broadcast_frame(
-                            stream_id, 
-                            latest_frame,
-                            current_viewers,
-                            next_processor,
-                            current_processor_type
-                        )
-                    )
+            await broadcast_json(current_viewers, {
+                "type": "error",
+                "message": "Frame processing failed, please try again",
+                "details": str(e)
+            }, "processing error")
+    
+    def encode_frame(frame_bytes):
+        """Encode JPEG bytes as base64 text (CPU-bound on full frames, run it in a worker thread)"""
+        return base64.b64encode(frame_bytes).decode("ascii")
+    
+    def frame_settings(stream_id):
+        """The stream's current style prompt and strength, as included with each frame"""
+        settings = {}
+        stream = streams.get(stream_id)
+        if stream:
+            if stream.style_prompt:
+                settings["style_prompt"] = stream.style_prompt
+            settings["strength"] = stream.strength
+        return settings
     
-    async def broadcast_frame(stream_id, processed_frame, viewers, is_original=False, processor_type="standard"):
-        """Broadcast a processed frame to all viewers"""
-        # Make a copy of the viewers list to avoid modification during iteration
-        current_viewers = viewers.copy()
+    def build_frame_payload(stream_id, processed_frame):
+        """
+        Build the serialized frame message shared by every text receiver of a frame.
         
-        # Track disconnected viewers to remove
-        disconnected = []
+        Only the frame itself: the settings it was made with travel in the frame_meta
+        message, which is sent only when they change.
+        """
+        # Everything but the timestamp and the frame is fixed per stream, so the JSON is
+        # assembled from a cached prefix. Base64 needs no escaping, which lets the frame
+        # be spliced in directly instead of being scanned and copied by the encoder.
+        stream = streams.get(stream_id)
+        prefix = stream.frame_payload_prefix if stream else None
+        if prefix is None:
+            prefix = (
+                '{"type":"frame","streamId":' + orjson.dumps(stream_id).decode()
+                + ',"frame_encoding":"' + FRAME_ENCODING + '","timestamp":'
+            )
+            if stream:
+                stream.frame_payload_prefix = prefix
         
-        # Format the frame as a data URL if it's not already
-        if processed_frame and isinstance(processed_frame, str) and not processed_frame.startswith('data:'):
-            # Add proper data URL prefix for JPEG images
-            processed_frame = f"data:image/jpeg;base64,{processed_frame}"
-            logger.debug(f"Added data URL prefix to frame for stream {stream_id}")
+        # Use timestamp in milliseconds since epoch (like JavaScript's Date.now())
+        current_timestamp_ms = time.time_ns() // 1_000_000
+        return f'{prefix}{current_timestamp_ms},"frame":"{processed_frame}"}}'
+    
+    def build_frame_binary(frame_bytes):
+        """
+        Build the binary frame message: the timestamp in milliseconds since epoch as an
+        8-byte big-endian integer, followed by the JPEG bytes
+        """
+        # Use timestamp in milliseconds since epoch (like JavaScript's Date.now())
+        current_timestamp_ms = time.time_ns() // 1_000_000
+        return current_timestamp_ms.to_bytes(8, "big") + frame_bytes
+    
+    def build_frame_meta(stream_id, is_original=False, processor_type=DEFAULT_PROCESSOR_TYPE):
+        """Build the serialized metadata that precedes frames whenever it changes"""
+        meta = {
+            "type": "frame_meta",
+            "streamId": stream_id,
+            "is_original": is_original,
+            "processor_type": processor_type,
+            "processed": not is_original,
+            **frame_settings(stream_id)
+        }
         
-        # Get current style prompt and strength
-        current_prompt = None
-        current_strength = None
-        if stream_id in streams:
-            if "style_prompt" in streams[stream_id]:
-                current_prompt = streams[stream_id]["style_prompt"]
-            if "strength" in streams[stream_id]:
-                current_strength = streams[stream_id]["strength"]
+        return orjson.dumps(meta).decode()
+    
+    async def send_frame(websocket, meta_payload, frame):
+        """
+        Send a frame (raw JPEG bytes or a serialized frame message), preceded by its
+        metadata if that changed since the last frame sent to this connection
+        """
+        if frame_meta_sent.get(websocket) != meta_payload:
+            await websocket.send_text(meta_payload)
+            frame_meta_sent[websocket] = meta_payload
+        if isinstance(frame, bytes):
+            await websocket.send_bytes(frame)
+        else:
+            await websocket.send_text(frame)
+    
+    async def broadcast_frame(stream_id, processed_frame, viewers, is_original=False, processor_type=DEFAULT_PROCESSOR_TYPE, payload=None, frame_bytes=None):
+        """
+        Broadcast a processed frame to all viewers.
         
-        # Use timestamp in milliseconds since epoch (like JavaScript's Date.now())
-        current_timestamp_ms = int(time.time() * 1000)
+        Viewers that connected with binary=true get frame_bytes as a binary message
+        (see build_frame_binary) instead, when provided. The text frame message is only
+        built for the other viewers; it is returned (None if nobody needed it), so it can
+        be passed back in as payload to reuse it for another group of receivers. Sends
+        are handed to each viewer's sender task, so this returns without waiting for
+        slow connections.
+        """
+        # Snapshot the viewers to avoid modification during iteration
+        current_viewers = list(viewers)
         
-        # Log helpful debug information about the frame being sent
         frame_type = "original" if is_original else "processed"
         viewer_count = len(current_viewers)
         
         # If we have no viewers, check if there are some in active_connections
         if viewer_count == 0 and stream_id in active_connections:
-            logger.warning(f"No viewers in passed list, but found {len(active_connections[stream_id]['viewers'])} viewers in active_connections")
-            current_viewers = active_connections[stream_id]["viewers"].copy()
+            viewers = active_connections[stream_id]["viewers"]
+            current_viewers = list(viewers)
             viewer_count = len(current_viewers)
         
-        logger.info(f"Broadcasting {frame_type} frame to {viewer_count} viewers for stream {stream_id} using {processor_type} processor")
-        
+        # A broadcaster streaming without viewers is normal, and this runs for every
+        # frame: not worth more than a debug line
         if viewer_count == 0:
-            logger.warning(f"No viewers to broadcast to for stream {stream_id} - frames are being processed but not delivered")
-            return
+            logger.debug(f"No viewers to broadcast to for stream {stream_id}")
+            return payload
         
-        successful_deliveries = 0
-        for i, viewer in enumerate(current_viewers):
-            try:
-                # Don't try to check connection state - just attempt to send and catch errors
-                message = {
-                    "type": "frame",
-                    "streamId": stream_id,
-                    "frame": processed_frame,
-                    "timestamp": current_timestamp_ms,
-                    "is_original": is_original,
-                    "processor_type": processor_type,
-                    "processed": not is_original  # Add explicit processed flag opposite of is_original
-                }
-                
-                # Include style prompt with each frame if available
-                if current_prompt:
-                    message["style_prompt"] = current_prompt
-                
-                # Include strength with each frame if available
-                if current_strength is not None:
-                    message["strength"] = current_strength
-                
-                # Log detailed message structure but skip the actual frame data
-                debug_message = message.copy()
-                if "frame" in debug_message:
-                    frame_size = len(debug_message["frame"]) if debug_message["frame"] else 0
-                    debug_message["frame"] = f"[data:image... {frame_size} bytes]"
-                logger.debug(f"Sending message to viewer {i}: {debug_message}")
-                
-                await viewer.send_json(message)
-                successful_deliveries += 1
-                logger.debug(f"Successfully sent frame to viewer {i}")
-            except Exception as e:
-                logger.error(f"Error sending to viewer {i}: {str(e)}")
-                disconnected.append(viewer)
-        
-        # Remove disconnected viewers
-        for viewer in disconnected:
-            logger.info(f"Removing disconnected viewer from stream {stream_id}")
-            if viewer in viewers:
-                viewers.remove(viewer)
+        logger.debug(f"Broadcasting {frame_type} frame to {viewer_count} viewers for stream {stream_id} using {processor_type} processor")
         
-        # Log success rate
-        if viewer_count > 0:
-            success_rate = (successful_deliveries / viewer_count) * 100
-            logger.info(f"Successfully delivered {frame_type} frame to {successful_deliveries}/{viewer_count} viewers ({success_rate:.1f}%)")
+        meta_payload = build_frame_meta(stream_id, is_original, processor_type)
+        binary_frame = None
+        dropped = 0
+        for viewer in current_viewers:
+            if viewer in binary_clients and frame_bytes is not None:
+                if binary_frame is None:
+                    binary_frame = build_frame_binary(frame_bytes)
+                send = partial(send_frame, viewer, meta_payload, binary_frame)
+            else:
+                if payload is None:
+                    payload = build_frame_payload(stream_id, processed_frame)
+                send = partial(send_frame, viewer, meta_payload, payload)
             
-            # If no successful deliveries, this is a critical issue
-            if successful_deliveries == 0:
-                logger.error(f"CRITICAL: Failed to deliver frame to ANY viewers for stream {stream_id}")
-        elif disconnected:
-            logger.warning(f"Removed {len(disconnected)} disconnected viewers but no active viewers remain")
+            # Each viewer's sender task writes the frame out, so a slow viewer doesn't
+            # hold up the others
+            if not queue_frame_send(viewer, viewers, send):
+                dropped += 1
+        
+        if dropped:
+            logger.debug(f"Dropped {dropped}/{viewer_count} undelivered {frame_type} frames for slow viewers of stream {stream_id}")
+        
+        return payload
+    
+    def queue_frame_send(websocket, viewers, send):
+        """
+        Make a frame send the next one for a connection, replacing one it hasn't started.
+        
+        Frames are lossy, so a viewer that can't keep up skips frames instead of building
+        an unbounded transmit backlog. Returns False if an undelivered frame was dropped.
+        """
+        sender = frame_senders.get(websocket)
+        if sender is None:
+            queue = asyncio.Queue(maxsize=1)
+            sender = frame_senders[websocket] = (queue, asyncio.create_task(send_frames(websocket, viewers, queue)))
+        
+        queue = sender[0]
+        dropped = queue.full()
+        if dropped:
+            queue.get_nowait()
+        queue.put_nowait(send)
+        return not dropped
+    
+    async def send_frames(websocket, viewers, queue):
+        """Write a connection's queued frames one at a time until a send fails"""
+        try:
+            while True:
+                send = await queue.get()
+                await asyncio.wait_for(send(), FRAME_SEND_TIMEOUT)
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            viewers.discard(websocket)
+            if websocket in broadcaster_clients:
+                # A subscribed broadcaster's preview stalled: unsubscribe it, but keep its
+                # socket open, since closing it would end the stream for every viewer
+                logger.info(f"Unsubscribing broadcaster that didn't accept a processed frame within {FRAME_SEND_TIMEOUT}s")
+                return
+            # The cancelled send may have been cut off mid-message, so the connection
+            # can't be used any more: close it, so the client notices and reconnects
+            # instead of waiting on a socket that no longer receives frames
+            logger.info(f"Closing viewer that didn't accept a frame within {FRAME_SEND_TIMEOUT}s")
+            try:
+                await asyncio.wait_for(websocket.close(code=1011, reason="Send timed out"), FRAME_SEND_TIMEOUT)
+            except Exception as e:
+                logger.debug(f"Error closing stalled viewer: {e}")
+        except Exception as e:
+            logger.info(f"Removing disconnected viewer after failed send: {e}")
+            viewers.discard(websocket)
+        finally:
+            if frame_senders.get(websocket, (None, None))[1] is asyncio.current_task():
+                del frame_senders[websocket]
+    
+    def stop_frame_sender(websocket):
+        """Cancel a connection's frame sender, dropping any frame it has not sent yet"""
+        sender = frame_senders.pop(websocket, None)
+        if sender is not None:
+            sender[1].cancel()
+    
+    # Static responses, serialized once when the app is built
+    root_body = orjson.dumps({"status": "ok", "service": "livestream-processor-websocket"})
+    processors_body = orjson.dumps({
+        "available_processors": list(global_processors),
+        "default_processor": DEFAULT_PROCESSOR_TYPE
+    })
     
     @app.get("/")
     async def root():
-        return {"status": "ok", "service": "livestream-processor-websocket"}
+        return Response(content=root_body, media_type="application/json")
+    
+    # Serialized /streams response and when it was built, so polling dashboards don't
+    # rebuild the listing on every request
+    streams_cache = {"built_at": 0.0, "body": None}
     
     @app.get("/streams")
     async def get_streams():
-        return {
-            "active_streams": [{
-                "id": stream_id,
-                "broadcasters": len(conns["broadcasters"]),
-                "viewers": len(conns["viewers"]),
-                "processor_type": streams[stream_id].get("processor_type", "standard") if stream_id in streams else "standard",
-                "strength": streams[stream_id].get("strength", 0.9) if stream_id in streams else 0.9
-            } for stream_id, conns in active_connections.items()]
-        }
+        now = time.monotonic()
+        if streams_cache["body"] is None or now - streams_cache["built_at"] >= STREAMS_CACHE_TTL:
+            active_streams = []
+            for stream_id, conns in active_connections.items():
+                stream = streams.get(stream_id)
+                active_streams.append({
+                    "id": stream_id,
+                    "broadcasters": len(conns["broadcasters"]),
+                    "viewers": len(conns["viewers"]),
+                    "processor_type": stream.processor_type if stream else DEFAULT_PROCESSOR_TYPE,
+                    "strength": stream.strength if stream else 0.9
+                })
+            streams_cache["body"] = orjson.dumps({"active_streams": active_streams})
+            streams_cache["built_at"] = now
+        return Response(content=streams_cache["body"], media_type="application/json")
     
     @app.get("/processors")
     async def get_available_processors():
         """Return information about the available processors"""
-        processors = ["standard", "lightning"]
-            
-        return {
-            "available_processors": processors,
-            "default_processor": "lightning"
-        }
+        return Response(content=processors_body, media_type="application/json")
     
     return app
\ No newline at end of file
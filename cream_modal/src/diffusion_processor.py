@@ -120,6 +120,37 @@ async def process_base64_frame(
         logger.error(f"Unknown processor type: {type(processor)}")
         return base64_frame
 
+async def process_bytes_frame(
+    frame_bytes: bytes,
+    processor: Union[sd.LivestreamImageProcessor, ld.LightningDiffusionProcessor],
+    prompt: str,
+    negative_prompt: str | None = None,
+    strength: float | None = None
+) -> bytes:
+    """
+    Process a raw image frame using the provided processor.
+    
+    Counterpart of process_base64_frame for frames that arrive as binary WebSocket
+    messages, skipping the base64 round trip.
+    
+    Args:
+        frame_bytes: Encoded image bytes (e.g. JPEG)
+        processor: Diffusion processor instance (either standard or lightning)
+        prompt: Optional style prompt
+        negative_prompt: Optional negative prompt
+        strength: Optional strength value to override processor default (0.0-1.0)
+        
+    Returns:
+        Processed JPEG bytes (the original bytes if processing failed)
+    """
+    processed_data, _ = await processor.process_frame(
+        frame_bytes,
+        prompt=prompt,
+        negative_prompt=negative_prompt,
+        strength=strength
+    )
+    return processed_data
+
 async def apply_diffusion(
     img_data: bytes,
     prompt: str,
@@ -1,10 +1,16 @@
 import time
 import io
-import base64
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass
 
 from PIL import Image
 import numpy as np
 import torch
+from torch.nn.attention import SDPBackend, sdpa_kernel
 from diffusers.pipelines.stable_diffusion_xl.pipeline_stable_diffusion_xl import StableDiffusionXLPipeline
 from diffusers.pipelines.stable_diffusion_xl.pipeline_stable_diffusion_xl_img2img import StableDiffusionXLImg2ImgPipeline
 from diffusers.pipelines.controlnet.pipeline_controlnet_sd_xl import StableDiffusionXLControlNetPipeline
@@ -18,6 +24,74 @@ from transformers import pipeline
 
 from src.utils.logger import logger
 
+# pybase64 (SIMD) is only installed in the GPU image and is a drop-in for the stdlib module
+try:
+    import pybase64 as base64
+except ImportError:
+    import base64
+from src.utils.jpeg import decode_jpeg_gpu, encode_jpeg, encode_jpeg_gpu, nvjpeg_decoder, nvjpeg_encoder
+
+# torchao is only installed in the GPU image; without it the UNet runs unquantized
+try:
+    from torchao.quantization import quantize_, int8_weight_only, float8_weight_only
+    HAS_TORCHAO = True
+except ImportError:
+    HAS_TORCHAO = False
+
+# SDXL training resolutions. Frames are snapped to the closest aspect ratio so the
+# compiled UNet only ever sees this fixed set of shapes and never recompiles.
+MODEL_INPUT_SIZES = [
+    (1024, 1024),
+    (1152, 896),
+    (896, 1152),
+    (1344, 768),
+    (768, 1344),
+]
+
+# SDPA kernels used for inference. The memory-efficient kernel only covers shapes
+# that FlashAttention-2 does not support.
+ATTENTION_BACKENDS = [SDPBackend.FLASH_ATTENTION, SDPBackend.EFFICIENT_ATTENTION]
+
+# Frames submitted concurrently (e.g. from several streams) are coalesced into one
+# pipeline call. Batches are padded to a power of two so the compiled UNet only has
+# to be captured for a few batch sizes.
+MAX_BATCH_SIZE = 4
+MAX_BATCH_WAIT_MS = 20
+BATCH_SIZES = sorted({min(2 ** i, MAX_BATCH_SIZE) for i in range(MAX_BATCH_SIZE.bit_length() + 1)})
+
+# Number of encoded prompts kept on the GPU. Streams rarely change their prompt, so
+# this only needs to cover the prompts of the streams currently being served.
+PROMPT_CACHE_SIZE = 32
+
+# Number of processed frames kept for repeated inputs. A broadcaster that sends the same
+# frame again (a paused or static source) is served from here instead of the GPU.
+RESULT_CACHE_SIZE = 64
+
+
+def model_input_size(width: int, height: int) -> tuple[int, int]:
+    """Return the model input size whose aspect ratio is closest to the given size's."""
+    aspect_ratio = width / height
+    return min(MODEL_INPUT_SIZES, key=lambda size: abs(size[0] / size[1] - aspect_ratio))
+
+
+def image_size(image: Image.Image | torch.Tensor) -> tuple[int, int]:
+    """Return (width, height) of a PIL image or a (channels, height, width) tensor."""
+    if isinstance(image, torch.Tensor):
+        return image.shape[-1], image.shape[-2]
+    return image.size
+
+
+def resize_to_model_input(image: Image.Image) -> Image.Image:
+    """Resize image to the model input size whose aspect ratio is closest to the image's."""
+    width, height = image.size
+    target_size = model_input_size(width, height)
+    
+    if image.size != target_size:
+        logger.debug(f"Resizing image from {width}x{height} to {target_size[0]}x{target_size[1]}")
+        return image.resize(target_size, Image.Resampling.LANCZOS)
+    
+    return image
+
 
 class LightningDiffusionProcessor:
     """
@@ -42,7 +116,8 @@ class LightningDiffusionProcessor:
     def __init__(self, 
                  use_controlnet: bool, 
                  strength: float,
-                 num_steps: int):
+                 num_steps: int,
+                 torch_dtype: str = "bfloat16"):
         """
         Initialize the SDXL Lightning processor.
         
@@ -51,10 +126,12 @@ class LightningDiffusionProcessor:
             style_prompt: The style prompt to apply to all frames
             strength: How strongly to apply the diffusion (0.0-1.0)
             num_steps: Number of inference steps (1, 2, 4, or 8)
+            torch_dtype: Name of the torch dtype used for the models on GPU (CPU always uses float32)
         """
         self.use_controlnet = use_controlnet
         self.strength = strength
         self.num_steps = num_steps
+        self.torch_dtype = torch_dtype
         
         
         # Initialize metrics for monitoring
@@ -63,10 +140,23 @@ class LightningDiffusionProcessor:
         self.last_processing_time = 0.0
         
         # Used to cache pipeline and depth map
+        self.device = None
         self.pipe = None
         self.depth_map = None
         self.depth_estimator = None
         
+        # Text encoder outputs keyed by (prompt, negative prompt, classifier-free guidance)
+        self.prompt_cache: OrderedDict[tuple, tuple] = OrderedDict()
+        
+        # Encoded results keyed by (frame digest, prompt, negative prompt, guidance scale, strength)
+        self.result_cache: OrderedDict[tuple, bytes] = OrderedDict()
+        
+        # Coalesces concurrent frames into batched pipeline calls
+        self.batcher = FrameBatcher(self)
+        
+        # Per-thread CUDA streams for the decode and depth work of concurrent frames
+        self.side_streams = threading.local()
+        
         # Track detailed timings
         self.timings = {
             'unet_loading': 0.0,
@@ -93,6 +183,12 @@ class LightningDiffusionProcessor:
         # Determine device to use
         device = "cuda" if torch.cuda.is_available() else "cpu"
         logger.info(f"Using device: {device}")
+        self.device = device
+        
+        # bfloat16 has the range of float32, so unlike float16 the SDXL VAE doesn't have
+        # to be upcast to float32 around every decode
+        dtype = getattr(torch, self.torch_dtype) if device == "cuda" else torch.float32
+        logger.info(f"Using dtype: {dtype}")
         
         # Determine which checkpoint to use based on inference steps
         logger.info(f"Using {self.num_steps}-step SDXL-Lightning checkpoint")
@@ -129,7 +225,7 @@ class LightningDiffusionProcessor:
         with logger.span("Loading UNet"):
             # Ensure we get a properly typed model instance
             unet = UNet2DConditionModel.from_pretrained(
-                base_model, subfolder="unet", torch_dtype=torch.float16 if device == "cuda" else torch.float32,
+                base_model, subfolder="unet", torch_dtype=dtype,
                 use_safetensors=True
             )
             # Cast to the right type to satisfy linter
@@ -152,7 +248,7 @@ class LightningDiffusionProcessor:
                 # Ensure we get a properly typed model instance
                 controlnet = ControlNetModel.from_pretrained(
                     controlnet_model_name,
-                    torch_dtype=torch.float16 if device == "cuda" else torch.float32,
+                    torch_dtype=dtype,
                     use_safetensors=True
                 )
                 controlnet = controlnet.to(device) # type: ignore
@@ -162,7 +258,6 @@ class LightningDiffusionProcessor:
             
         # Create pipeline based on number of steps and ControlNet usage
         with logger.span("Creating pipeline"):
-            dtype = torch.float16 if device == "cuda" else torch.float32
             if self.num_steps == 1:
                 # For 1-step, use the StableDiffusionXLPipeline directly as in model card
                 logger.info(f"Creating txt2img pipeline with {base_model} for 1-step model")
@@ -199,31 +294,83 @@ class LightningDiffusionProcessor:
         
         # Apply performance optimizations
         with logger.span("Applying performance optimizations"):
-            if hasattr(self.pipe, "enable_attention_slicing"):
-                self.pipe.enable_attention_slicing()
-            
-            # Enable xFormers memory efficient attention if available and on GPU
             if device == "cuda":
+                # Route every attention call through torch SDPA so run_pipeline's
+                # sdpa_kernel context can pin it to FlashAttention-2. Slicing and xFormers
+                # would both replace these processors with slower or non-SDPA ones.
                 try:
-                    if hasattr(self.pipe, "enable_xformers_memory_efficient_attention"):
-                        self.pipe.enable_xformers_memory_efficient_attention()
-                        logger.info("Enabled xFormers memory efficient attention")
+                    models = [self.pipe.unet, self.pipe.vae]
+                    # The ControlNet runs its own attention blocks on every step
+                    if getattr(self.pipe, "controlnet", None) is not None:
+                        models.append(self.pipe.controlnet)
+                    for model in models:
+                        model.set_attn_processor(AttnProcessor2_0())
+                    logger.info("Enabled SDPA attention processors")
                 except Exception as e:
-                    logger.warning(f"Error enabling xFormers: {e}")
-                    # Try using SDPA as fallback
-                    try:
-                        logger.info("Trying to use Scaled Dot Product Attention (SDPA) as alternative")
-                        self.pipe.unet.set_attn_processor(AttnProcessor2_0())
-                        self.pipe.vae.set_attn_processor(AttnProcessor2_0())
-                        logger.info("Enabled SDPA attention mechanism")
-                    except Exception as e2:
-                        logger.warning(f"Error enabling SDPA: {e2}")
-            
+                    logger.warning(f"Error enabling SDPA: {e}")
+
                 # Set torch CUDA operations to be non-blocking for better parallelism
                 torch.backends.cudnn.benchmark = True
+            elif hasattr(self.pipe, "enable_attention_slicing"):
+                self.pipe.enable_attention_slicing()
+
+        # Compile the UNet (which dominates per-step runtime) and the ControlNet that runs
+        # alongside it on every step, and capture them as CUDA graphs
+        if device == "cuda":
+            with logger.span("Compiling UNet"):
+                optimization_start = time.time()
+                # Let matmuls use TF32 and lower 1x1 convolutions to matmuls in Inductor
+                torch.set_float32_matmul_precision("high")
+                torch._inductor.config.conv_1x1_as_mm = True
+                
+                # Leave headroom for one graph per model input size
+                torch._dynamo.config.cache_size_limit = 16
+                controlnet = getattr(self.pipe, "controlnet", None)
+                denoisers = {"unet": self.pipe.unet}
+                if controlnet is not None:
+                    denoisers["controlnet"] = controlnet
+                
+                self.pipe.vae.to(memory_format=torch.channels_last)
+                for name, model in denoisers.items():
+                    model.to(memory_format=torch.channels_last)
+                    
+                    # Weight-only quantization cuts the bytes read per step; it has to
+                    # happen before compile so Inductor sees the quantized weights
+                    if HAS_TORCHAO:
+                        if torch.cuda.get_device_capability() >= (8, 9):
+                            logger.info(f"Quantizing {name} weights to float8")
+                            quantize_(model, float8_weight_only())
+                        else:
+                            logger.info(f"Quantizing {name} weights to int8")
+                            quantize_(model, int8_weight_only())
+                    else:
+                        logger.warning(f"torchao not available, {name} weights will not be quantized")
+                    
+                    setattr(self.pipe, name, torch.compile(model, mode="reduce-overhead", fullgraph=True))
+                
+                # Move the compile cost out of the request path
+                self.warmup()
+                self.timings['optimization'] = time.time() - optimization_start
+                logger.info(f"Compiled and warmed up {', '.join(denoisers)} in {self.timings['optimization']:.2f}s")
     
 
 
+    def side_stream(self):
+        """
+        Return a CUDA stream context for per-frame work in the calling thread.
+        
+        Frames are decoded and depth-estimated in worker threads while the batcher runs
+        diffusion on the default stream. Giving every worker thread its own stream lets
+        that work overlap on the GPU instead of queueing behind the denoising kernels.
+        """
+        if self.device != "cuda":
+            return nullcontext()
+        
+        stream = getattr(self.side_streams, "stream", None)
+        if stream is None:
+            stream = self.side_streams.stream = torch.cuda.Stream()
+        return torch.cuda.stream(stream)
+    
     def generate_depth_map(self, image: Image.Image) -> Image.Image:
         """Generate a depth map from an input image."""
         if not self.use_controlnet:
@@ -236,8 +383,9 @@ class LightningDiffusionProcessor:
         if image.mode != 'RGB':
             image = image.convert('RGB')
         
-        # Get depth map from model
-        outputs = self.depth_estimator(image)
+        # Get depth map from model. The copy to host below waits for the side stream.
+        with self.side_stream(), torch.inference_mode():
+            outputs = self.depth_estimator(image)
             
         # Convert output tensor to numpy array
         if isinstance(outputs, dict):
@@ -272,6 +420,269 @@ class LightningDiffusionProcessor:
         
         return depth_image
     
+    def generate_depth_map_gpu(self, image: torch.Tensor) -> torch.Tensor:
+        """
+        Generate a depth map from a (3, height, width) CUDA image in [0, 1] on the GPU.
+        
+        Runs the estimator's model directly, with its resize and normalization done as
+        tensor ops, and returns a 3-channel control image in [0, 1] of the same size.
+        """
+        if not self.use_controlnet:
+            raise ValueError("Depth map generation is only available when use_controlnet=True")
+        
+        if self.depth_estimator is None:
+            self.depth_estimator = pipeline('depth-estimation', device="cuda")
+        
+        model = self.depth_estimator.model
+        image_processor = self.depth_estimator.image_processor
+        model_size = (image_processor.size["height"], image_processor.size["width"])
+        _, height, width = image.shape
+        
+        with self.side_stream(), torch.inference_mode():
+            mean = torch.tensor(image_processor.image_mean, device=image.device).view(1, 3, 1, 1)
+            std = torch.tensor(image_processor.image_std, device=image.device).view(1, 3, 1, 1)
+            pixel_values = torch.nn.functional.interpolate(
+                image.unsqueeze(0).float(), size=model_size, mode="bicubic", antialias=True
+            )
+            pixel_values = (pixel_values - mean) / std
+            
+            depth = model(pixel_values=pixel_values.to(model.dtype)).predicted_depth
+            depth = torch.nn.functional.interpolate(
+                depth.unsqueeze(1).float(), size=(height, width), mode="bicubic"
+            )[0]
+            
+            # Normalize to [0, 1] and repeat into the RGB channels the ControlNet expects
+            depth_min, depth_max = depth.amin(), depth.amax()
+            depth = ((depth - depth_min) / (depth_max - depth_min).clamp_min(1e-6)).clamp_(0, 1)
+            control_image = depth.expand(3, -1, -1).to(image.dtype)
+            
+            # Same hand-over to the default stream as the decoded frame
+            torch.cuda.current_stream().synchronize()
+        control_image.record_stream(torch.cuda.default_stream())
+        return control_image
+    
+    def encode_prompt(self, prompt: str, negative_prompt: str | None, guidance_scale: float) -> tuple:
+        """
+        Encode a single prompt with both SDXL text encoders, reusing cached embeddings.
+        
+        The prompt of a stream changes rarely, so running the text encoders for every
+        frame is wasted work on the request path.
+        """
+        # The pipelines only use the negative prompt with classifier-free guidance
+        do_classifier_free_guidance = guidance_scale > 1.0
+        key = (prompt, negative_prompt or "", do_classifier_free_guidance)
+        
+        if key in self.prompt_cache:
+            self.prompt_cache.move_to_end(key)
+            return self.prompt_cache[key]
+        
+        with torch.inference_mode():
+            embeddings = self.pipe.encode_prompt(
+                prompt=prompt,
+                device=self.device,
+                num_images_per_prompt=1,
+                do_classifier_free_guidance=do_classifier_free_guidance,
+                negative_prompt=negative_prompt,
+            )
+        
+        self.prompt_cache[key] = embeddings
+        if len(self.prompt_cache) > PROMPT_CACHE_SIZE:
+            self.prompt_cache.popitem(last=False)
+        return embeddings
+    
+    def get_prompt_embeds(
+        self,
+        prompt: str | list[str],
+        negative_prompt: str | list[str] | None,
+        guidance_scale: float
+    ) -> dict[str, torch.Tensor | None]:
+        """Build the prompt embedding arguments of a pipeline call from cached encodings."""
+        prompts = [prompt] if isinstance(prompt, str) else prompt
+        if negative_prompt is None or isinstance(negative_prompt, str):
+            negative_prompts = [negative_prompt] * len(prompts)
+        else:
+            negative_prompts = negative_prompt
+        
+        encoded = [
+            self.encode_prompt(p, n, guidance_scale)
+            for p, n in zip(prompts, negative_prompts)
+        ]
+        names = ["prompt_embeds", "negative_prompt_embeds", "pooled_prompt_embeds", "negative_pooled_prompt_embeds"]
+        
+        # Negative embeddings are None without classifier-free guidance
+        return {
+            name: torch.cat([item[i] for item in encoded]) if encoded[0][i] is not None else None
+            for i, name in enumerate(names)
+        }
+    
+    def run_pipeline(
+        self,
+        prompt: str | list[str],
+        negative_prompt: str | list[str] | None,
+        image: Image.Image | torch.Tensor | list[Image.Image] | list[torch.Tensor],
+        control_image: Image.Image | torch.Tensor | list[Image.Image] | list[torch.Tensor] | None = None,
+        guidance_scale: float = 1.0,
+        strength: float = 0.9,
+        output_type: str = "pil"
+    ):
+        """
+        Run the diffusion pipeline on already prepared model input images.
+        
+        Shared by the frame batcher and warmup so that the warm-up exercises exactly the
+        same call (and therefore the same compiled graph) as real frames. Lists are
+        processed as a single batch.
+        """
+        prompt_embeds = self.get_prompt_embeds(prompt, negative_prompt, guidance_scale)
+        
+        # Prefer FlashAttention-2 and keep the math kernel out of the picture on GPU.
+        # inference_mode also skips the version counters and view tracking that no_grad
+        # (used by the diffusers pipelines) still keeps.
+        attention_context = sdpa_kernel(ATTENTION_BACKENDS) if self.device == "cuda" else nullcontext()
+        with attention_context, torch.inference_mode():
+            if self.num_steps == 1:
+                with logger.span("Processing with 1-step text-to-image pipeline"):
+                    return self.pipe(
+                        **prompt_embeds,
+                        num_inference_steps=self.num_steps,
+                        guidance_scale=guidance_scale,
+                        strength=strength,
+                        output_type=output_type,
+                    )
+            
+            elif self.use_controlnet:
+                # Process with ControlNet
+                with logger.span("Processing with controlnet pipeline"):
+                    return self.pipe(
+                        **prompt_embeds,
+                        image=image,
+                        control_image=control_image,
+                        num_inference_steps=self.num_steps,
+                        guidance_scale=guidance_scale,
+                        controlnet_conditioning_scale=0.5,
+                        strength=strength,
+                        output_type=output_type,
+                    )
+            
+            else:
+                # Standard img2img without ControlNet
+                if not isinstance(self.pipe, (StableDiffusionXLImg2ImgPipeline, StableDiffusionXLPipeline, StableDiffusionXLControlNetPipeline)):
+                    raise TypeError(f"Pipeline type doesn't match the requested operation (Img2Img). Type found: {type(self.pipe)}")
+            
+                logger.info(f"Processing with img2img pipeline, steps={self.num_steps}, strength={strength}")
+                with logger.span("Processing with img2img pipeline"):
+                    return self.pipe(
+                        **prompt_embeds,
+                        image=image,
+                        num_inference_steps=self.num_steps,
+                        guidance_scale=guidance_scale,
+                        strength=strength,
+                        output_type=output_type,
+                    )
+
+    def generate(self, **kwargs) -> list[bytes]:
+        """
+        Run the pipeline and return the results as JPEG bytes.
+        
+        On GPU with nvImageCodec available the decoded images stay on the device and are
+        encoded by nvJPEG, skipping the copy to host memory and the CPU encode.
+        """
+        if self.device == "cuda" and nvjpeg_encoder is not None:
+            output = self.run_pipeline(**kwargs, output_type="pt")
+            return encode_jpeg_gpu(output.images, quality=95) # type: ignore
+        
+        output = self.run_pipeline(**kwargs)
+        images = output.images if hasattr(output, 'images') else output # type: ignore
+        if not isinstance(images, (tuple, list)):
+            raise ValueError(f"Unexpected output type: {type(output)}")
+        return [encode_jpeg(image, quality=95) for image in images]
+
+    def warmup(self):
+        """
+        Run dummy frames through the pipeline at every model input size and batch size
+        so the compiled UNet is captured for all of them before the first real frame arrives.
+        """
+        for size in MODEL_INPUT_SIZES:
+            warmup_image = Image.new("RGB", size)
+            for batch_size in BATCH_SIZES:
+                logger.info(f"Warming up pipeline at {size[0]}x{size[1]}, batch size {batch_size}")
+                
+                # reduce-overhead records CUDA graphs on the second and third call, so
+                # a single pass would still leave capture work on the request path
+                for _ in range(3):
+                    self.run_pipeline(
+                        prompt=["warmup"] * batch_size,
+                        negative_prompt=None,
+                        image=[warmup_image] * batch_size,
+                        control_image=[warmup_image] * batch_size,
+                        strength=self.strength,
+                    )
+    
+    def prepare_input(self, frame_data: bytes) -> tuple[Image.Image | None, Image.Image | torch.Tensor]:
+        """
+        Decode a frame and resize it to a model input size.
+        
+        On GPU with nvImageCodec available the frame is decoded by nvJPEG and resized on
+        the device, so only the compressed bytes cross the PCIe bus.
+        
+        Returns:
+            The decoded RGB image (None when decoded on the GPU) and the model input image,
+            a (3, height, width) CUDA tensor on GPU
+        """
+        if self.device == "cuda" and nvjpeg_decoder is not None:
+            try:
+                with self.side_stream():
+                    model_input_image = self.prepare_input_gpu(frame_data)
+                    # The pipeline consumes the tensor on the default stream: wait for the
+                    # decode here, in the worker thread, and keep the allocator from
+                    # reusing its memory until the default stream is done with it
+                    torch.cuda.current_stream().synchronize()
+                model_input_image.record_stream(torch.cuda.default_stream())
+                return None, model_input_image
+            except Exception as e:
+                # nvJPEG rejects some encodings (e.g. progressive with unusual sampling)
+                logger.warning(f"GPU decode failed, falling back to PIL: {e}")
+        
+        # Convert bytes to PIL Image
+        input_buffer = io.BytesIO(frame_data)
+        input_image = Image.open(input_buffer)
+        
+        # Log image details for debugging
+        logger.debug(f"Image: {input_image.format}, size: {input_image.size}, mode: {input_image.mode}. {len(frame_data)} bytes")
+        
+        # Ensure RGB mode
+        if input_image.mode != 'RGB':
+            input_image = input_image.convert('RGB')
+
+        model_input_image = resize_to_model_input(input_image)
+        
+        # Keep model inputs the same type within a batch: frames decoded on the
+        # GPU are tensors, so frames that fell back to PIL have to be as well
+        if self.device == "cuda" and nvjpeg_decoder is not None:
+            # Upload from pinned memory on the side stream, so the copy is a real async
+            # DMA that overlaps the batch running on the default stream (a pageable
+            # source would be staged through a bounce buffer synchronously)
+            pixels = torch.from_numpy(np.asarray(model_input_image)).permute(2, 0, 1).pin_memory()
+            with self.side_stream():
+                model_input_image = pixels.to(self.device, non_blocking=True).to(self.pipe.dtype) / 255
+                torch.cuda.current_stream().synchronize()
+            model_input_image.record_stream(torch.cuda.default_stream())
+        
+        return input_image, model_input_image
+    
+    def prepare_input_gpu(self, frame_data: bytes) -> torch.Tensor:
+        """Decode a frame with nvJPEG and resize it to a model input size on the GPU."""
+        with torch.inference_mode():
+            pixels = decode_jpeg_gpu(frame_data)
+            _, height, width = pixels.shape
+            target_width, target_height = model_input_size(width, height)
+            
+            image = pixels.unsqueeze(0).float() / 255
+            if (width, height) != (target_width, target_height):
+                image = torch.nn.functional.interpolate(
+                    image, size=(target_height, target_width), mode="bicubic", antialias=True
+                ).clamp_(0, 1)
+            return image[0].to(self.pipe.dtype)
+    
     async def process_frame(
         self,
         frame_data: bytes,
@@ -279,7 +690,7 @@ class LightningDiffusionProcessor:
         negative_prompt: str | None, #= "ugly, deformed, disfigured, poor details, bad anatomy",
         guidance_scale: float = 1.0,
         strength: float | None = None  # Add optional strength parameter
-    ) -> tuple[bytes, Image.Image | None]:
+    ) -> tuple[bytes, Image.Image | torch.Tensor | None]:
         """
         Process a single frame with SDXL-Lightning.
         
@@ -301,45 +712,23 @@ class LightningDiffusionProcessor:
         if not frame_data or len(frame_data) == 0:
             logger.error("Empty frame data received")
             return frame_data, None
-            
-        # Convert bytes to PIL Image
-        input_buffer = io.BytesIO(frame_data)
-        input_image = Image.open(input_buffer)
-        
-        # Log image details for debugging
-        logger.info(f"Image: {input_image.format}, size: {input_image.size}, mode: {input_image.mode}. {len(frame_data)} bytes")
         
-        # Ensure RGB mode
-        if input_image.mode != 'RGB':
-            input_image = input_image.convert('RGB')
-
-        def resize_if_needed(image: Image.Image, max_size: int = 1500, min_size: int = 1200) -> Image.Image:
-            """Resize image if larger dimension exceeds max_size or smaller dimension is below min_size while maintaining aspect ratio."""
-            width, height = image.size
-            larger_dim = max(width, height)
-            smaller_dim = min(width, height)
-            
-            # Resize if image is too large or too small
-            if larger_dim > max_size or smaller_dim < min_size:
-                if larger_dim > max_size:
-                    scale = max_size / larger_dim
-                else:
-                    scale = min_size / smaller_dim
-                    
-                new_width = int(width * scale)
-                new_height = int(height * scale)
-                
-                logger.info(f"Resizing image from {width}x{height} to {new_width}x{new_height}")
-                return image.resize((new_width, new_height), Image.Resampling.LANCZOS)
+        # Identical frames with identical settings skip decoding and inference entirely.
+        # Hashing a full frame is CPU-bound (and all a cache hit costs), so it runs in a
+        # worker thread; hashlib releases the GIL on buffers this size.
+        frame_hash = await asyncio.to_thread(hashlib.blake2b, frame_data, digest_size=16)
+        cache_key = (frame_hash.digest(), prompt, negative_prompt, guidance_scale, current_strength)
+        cached = self.result_cache.get(cache_key)
+        if cached is not None:
+            self.result_cache.move_to_end(cache_key)
+            logger.debug("Serving repeated frame from the result cache")
+            return cached, None
             
-            return image
-
-        model_input_image = resize_if_needed(input_image)
+        # Decoding and resizing are CPU-bound, keep them off the event loop
+        with self.batcher.preparing_frame():
+            input_image, model_input_image = await asyncio.to_thread(self.prepare_input, frame_data)
         
         try:
-            # Free CUDA memory if needed
-            torch.cuda.empty_cache()
-            
             # Make sure pipe is initialized before calling it
             if self.pipe is None:
                 logger.error("Pipeline was not properly initialized")
@@ -348,88 +737,46 @@ class LightningDiffusionProcessor:
             # Process with the appropriate pipeline
             generation_start = time.time()
             
+            depth_map = None
             try:
-                if self.num_steps == 1:
-                    with logger.span("Processing with 1-step text-to-image pipeline"):
-                        output = self.pipe(
-                            prompt=prompt,
-                            negative_prompt=negative_prompt,
-                            num_inference_steps=self.num_steps,
-                            guidance_scale=guidance_scale,
-                            strength=current_strength,
-                        )
-                    
-                elif self.use_controlnet:
+                if self.use_controlnet and self.num_steps > 1:
                     with logger.span("Generating depth map"):
-                        self.depth_map = self.generate_depth_map(input_image)
-                    
-                    # Process with ControlNet
-                    with logger.span("Processing with controlnet pipeline"):
-                        output = self.pipe(
-                            prompt=prompt,
-                            image=model_input_image,
-                            control_image=self.depth_map,
-                            negative_prompt=negative_prompt,
-                            num_inference_steps=self.num_steps,
-                            guidance_scale=guidance_scale,
-                            controlnet_conditioning_scale=0.5,
-                            strength=current_strength,
-                        )
-                    
-                else:
-                    # Standard img2img without ControlNet
-                    if not isinstance(self.pipe, (StableDiffusionXLImg2ImgPipeline, StableDiffusionXLPipeline, StableDiffusionXLControlNetPipeline)):
-                        logger.error(f"Pipeline type doesn't match the requested operation (Img2Img). Type found: {type(self.pipe)}")
-                        return frame_data, None
-                    
-                    logger.info(f"Processing with img2img pipeline, steps={self.num_steps}, strength={current_strength}")
-                    with logger.span("Processing with img2img pipeline"):
-                        output = self.pipe(
-                            prompt=prompt,
-                            image=model_input_image,
-                            negative_prompt=negative_prompt,
-                            num_inference_steps=self.num_steps,
-                            guidance_scale=guidance_scale,
-                            strength=current_strength,
-                        )
+                        # Frames already on the GPU get their depth map there as well, so
+                        # the conditioning image never takes a round trip through the host
+                        with self.batcher.preparing_frame():
+                            if isinstance(model_input_image, torch.Tensor):
+                                depth_map = await asyncio.to_thread(self.generate_depth_map_gpu, model_input_image)
+                            else:
+                                depth_map = await asyncio.to_thread(self.generate_depth_map, input_image)
+                        self.depth_map = depth_map
+                
+                processed_data = await self.batcher.submit(
+                    prompt=prompt,
+                    negative_prompt=negative_prompt,
+                    image=model_input_image,
+                    control_image=depth_map,
+                    guidance_scale=guidance_scale,
+                    strength=current_strength,
+                )
             except Exception as e:
                 logger.error(f"Error during inference: {e}")
                 return frame_data, None
             
             self.timings['inference'] = time.time() - generation_start
-            logger.info(f"Inference completed in {self.timings['inference']:.2f}s")
+            logger.debug(f"Inference completed in {self.timings['inference']:.2f}s")
             
-            # Extract the output image
-            result_image = None
-            if hasattr(output, 'images') and isinstance(output.images, list) and len(output.images) > 0: # type: ignore
-                result_image = output.images[0] # type: ignore
-            elif isinstance(output, (tuple, list)) and len(output) > 0:
-                result_image = output[0] if isinstance(output[0], Image.Image) else None
-            
-            if result_image is None:
-                logger.error("No result image found")
-                raise ValueError(f"Unexpected output type: {type(output)}")
-                
-            # # Resize back to original dimensions
-            # logger.info(f"Resizing result back to original dimensions: {original_width}x{original_height}")
-            # result_image = result_image.resize((original_width, original_height), Image.Resampling.LANCZOS)
-                
-            # Convert result back to bytes with higher quality
-            output_buffer = io.BytesIO()
-            result_image.save(output_buffer, format="JPEG", quality=95)
-            processed_data = output_buffer.getvalue()
+            self.result_cache[cache_key] = processed_data
+            if len(self.result_cache) > RESULT_CACHE_SIZE:
+                self.result_cache.popitem(last=False)
             
             # Update statistics
             self.processed_frames += 1
             self.last_processing_time = time.time() - start_time
             self.total_processing_time += self.last_processing_time
             
-            logger.info(f"Frame processed in {self.last_processing_time:.2f}s (avg: {self.total_processing_time/self.processed_frames:.2f}s)")
-            
-            # Free memory
-            torch.cuda.empty_cache()
+            logger.debug(f"Frame processed in {self.last_processing_time:.2f}s (avg: {self.total_processing_time/self.processed_frames:.2f}s)")
                 
-            return processed_data, self.depth_map
+            return processed_data, depth_map
             
         except Exception as e:
             logger.error(f"Error processing frame: {e}")
@@ -449,6 +796,157 @@ class LightningDiffusionProcessor:
         }
 
 
+@dataclass
+class FrameRequest:
+    """A single frame waiting to be processed as part of a batch."""
+    prompt: str
+    negative_prompt: str | None
+    image: Image.Image | torch.Tensor
+    control_image: Image.Image | torch.Tensor | None
+    guidance_scale: float
+    strength: float
+    future: asyncio.Future
+
+
+class FrameBatcher:
+    """
+    Collects frames submitted concurrently and runs them through the pipeline together.
+    
+    Frames arriving within max_wait_ms of the first queued frame are batched, up to
+    max_batch_size. The window is skipped when no other frame is queued or being
+    prepared, so a single stream never waits for a batch that can't grow. Only frames
+    with the same image size, strength and guidance scale can share a pipeline call;
+    the rest are run as separate batches, cheapest first.
+    The pipeline runs in a worker thread so the event loop stays free while the GPU
+    is busy.
+    """
+    
+    def __init__(self, 
+                 processor: LightningDiffusionProcessor,
+                 max_batch_size: int = MAX_BATCH_SIZE,
+                 max_wait_ms: int = MAX_BATCH_WAIT_MS):
+        self.processor = processor
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        
+        # Created lazily so they bind to the event loop that serves requests
+        self.queue: asyncio.Queue | None = None
+        self.worker: asyncio.Task | None = None
+        
+        # Frames being decoded or depth-estimated, which may still join the next batch
+        self.preparing = 0
+    
+    @contextmanager
+    def preparing_frame(self):
+        """
+        Count a frame as on its way to submit() while the wrapped step runs.
+        
+        Wrap every await of a frame's preparation, with no other await between the
+        last one and submit(), so the batcher never sees the frame as neither
+        preparing nor queued.
+        """
+        self.preparing += 1
+        try:
+            yield
+        finally:
+            self.preparing -= 1
+    
+    async def submit(
+        self,
+        prompt: str,
+        negative_prompt: str | None,
+        image: Image.Image | torch.Tensor,
+        control_image: Image.Image | torch.Tensor | None,
+        guidance_scale: float,
+        strength: float
+    ) -> bytes:
+        """Queue a frame for the next batch and wait for its JPEG-encoded result."""
+        if self.queue is None:
+            self.queue = asyncio.Queue()
+        if self.worker is None or self.worker.done():
+            self.worker = asyncio.create_task(self._run())
+        
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put(FrameRequest(
+            prompt=prompt,
+            negative_prompt=negative_prompt,
+            image=image,
+            control_image=control_image,
+            guidance_scale=guidance_scale,
+            strength=strength,
+            future=future
+        ))
+        return await future
+    
+    async def _run(self):
+        """Worker loop that drains the queue into batches."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            
+            # Give other streams a short window to join this batch
+            deadline = loop.time() + self.max_wait_ms / 1000
+            while len(batch) < self.max_batch_size:
+                # Nothing queued and nothing on its way: waiting can't grow the batch
+                if self.queue.empty() and self.preparing == 0:
+                    break
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            # Only frames that produce identical tensor shapes and timesteps can share a call
+            groups: dict[tuple, list[FrameRequest]] = {}
+            for request in batch:
+                key = (image_size(request.image), request.strength, request.guidance_scale)
+                groups.setdefault(key, []).append(request)
+            
+            # Shortest job first: cheap groups don't wait behind larger ones
+            for group in sorted(groups.values(), key=self._estimated_cost):
+                await self._run_group(group)
+    
+    @staticmethod
+    def _estimated_cost(group: list[FrameRequest]) -> int:
+        """Relative GPU cost of a group, proportional to the pixels it denoises."""
+        width, height = image_size(group[0].image)
+        return width * height * len(group)
+    
+    async def _run_group(self, group: list[FrameRequest]):
+        """Run one compatible group through the pipeline and resolve its futures."""
+        # Pad to a warmed-up batch size by repeating the last frame
+        batch_size = next(size for size in BATCH_SIZES if size >= len(group))
+        padded = group + [group[-1]] * (batch_size - len(group))
+        
+        if len(group) > 1:
+            logger.info(f"Processing {len(group)} frames in one batch (padded to {batch_size})")
+        
+        negative_prompts = None
+        if any(request.negative_prompt for request in padded):
+            negative_prompts = [request.negative_prompt or "" for request in padded]
+        
+        try:
+            results = await asyncio.to_thread(
+                self.processor.generate,
+                prompt=[request.prompt for request in padded],
+                negative_prompt=negative_prompts,
+                image=[request.image for request in padded],
+                control_image=[request.control_image for request in padded],
+                guidance_scale=group[0].guidance_scale,
+                strength=group[0].strength,
+            )
+            
+            for request, result in zip(group, results):
+                if not request.future.done():
+                    request.future.set_result(result)
+        except Exception as e:
+            for request in group:
+                if not request.future.done():
+                    request.future.set_exception(e)
+
+
 # Singleton processor and lock
 processor = None
 processor_lock = None
@@ -458,6 +956,7 @@ def get_processor(
     use_controlnet: bool, 
     strength: float,
     num_steps,
+    torch_dtype: str = "bfloat16",
     **kwargs
 ) -> LightningDiffusionProcessor:
     """
@@ -512,7 +1011,8 @@ def get_processor(
             processor = LightningDiffusionProcessor(
                 use_controlnet=use_controlnet, 
                 strength=strength,
-                num_steps=num_steps
+                num_steps=num_steps,
+                torch_dtype=torch_dtype
             )
             
             # Initialization complete
@@ -638,4 +1138,8 @@ async def apply_lightning_diffusion(
         guidance_scale=guidance_scale
     )
     
+    # Frames preprocessed on the GPU carry their depth map as a control image tensor
+    if isinstance(depth_map, torch.Tensor):
+        depth_map = Image.fromarray((depth_map[0].float() * 255).round().to(torch.uint8).cpu().numpy())
+    
     return processed_bytes, depth_map
\ No newline at end of file
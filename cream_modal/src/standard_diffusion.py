@@ -1,6 +1,5 @@
 import time
 import io
-import base64
 from typing import Optional, Dict
 
 import torch
@@ -12,6 +11,13 @@ from diffusers.pipelines.auto_pipeline import AutoPipelineForImage2Image
 
 from src.utils.logger import logger
 
+# pybase64 (SIMD) is only installed in the GPU image and is a drop-in for the stdlib module
+try:
+    import pybase64 as base64
+except ImportError:
+    import base64
+from src.utils.jpeg import encode_jpeg
+
 class LivestreamImageProcessor:
     def __init__(self, 
                  use_controlnet: bool, 
@@ -69,7 +75,8 @@ class LivestreamImageProcessor:
         try:
             logger.info(f"Generating depth map for image of size {image.size}")
             start_time = time.time()
-            outputs = self.depth_estimator(image)
+            with torch.inference_mode():
+                outputs = self.depth_estimator(image)
             depth_time = time.time() - start_time
             logger.info(f"Depth map generated in {depth_time:.2f}s")
             
@@ -232,6 +239,7 @@ class LivestreamImageProcessor:
         if not success:
             logger.error(f"All {max_retries} setup attempts failed")
             raise RuntimeError("Failed to initialize pipeline after multiple attempts")
+    
     async def process_frame(
         self,
         frame_data: bytes,
@@ -334,49 +342,49 @@ class LivestreamImageProcessor:
             # Free CUDA memory if needed
             torch.cuda.empty_cache()
             
-            # Process with the appropriate pipeline
-            if self.use_controlnet:
-                # Generate depth map for ControlNet
-                depth_image = self.generate_depth_map(model_input_image)
+            # inference_mode skips autograd bookkeeping entirely (stronger than no_grad)
+            with torch.inference_mode():
+                # Process with the appropriate pipeline
+                if self.use_controlnet:
+                    # Generate depth map for ControlNet
+                    depth_image = self.generate_depth_map(model_input_image)
                 
-                # Process with ControlNet
-                generation_start = time.time()
-                logger.info(f"Processing with controlnet pipeline, strength={current_strength}")
-                result_image = self.pipeline(
-                    prompt,
-                    image=model_input_image,
-                    control_image=depth_image,
-                    strength=current_strength,  # Use custom strength if provided
-                    guidance_scale=guidance_scale,
-                    negative_prompt=negative_prompt,
-                    num_steps=25,  # Slightly increased for better quality
-                ).images[0]
-                generation_time = time.time() - generation_start
-                logger.info(f"Image generation took {generation_time:.2f}s")
-            else:
-                # Process without ControlNet
-                generation_start = time.time()
-                logger.info(f"Processing with standard pipeline, strength={current_strength}")
-                result_image = self.pipeline(
-                    prompt,
-                    image=model_input_image,
-                    strength=current_strength,  # Use custom strength if provided
-                    guidance_scale=guidance_scale,
-                    negative_prompt=negative_prompt,
-                    num_steps=25,  # Slightly increased for better quality
-                ).images[0]
-                generation_time = time.time() - generation_start
-                logger.info(f"Image generation took {generation_time:.2f}s")
-                depth_image = None
+                    # Process with ControlNet
+                    generation_start = time.time()
+                    logger.info(f"Processing with controlnet pipeline, strength={current_strength}")
+                    result_image = self.pipeline(
+                        prompt,
+                        image=model_input_image,
+                        control_image=depth_image,
+                        strength=current_strength,  # Use custom strength if provided
+                        guidance_scale=guidance_scale,
+                        negative_prompt=negative_prompt,
+                        num_steps=25,  # Slightly increased for better quality
+                    ).images[0]
+                    generation_time = time.time() - generation_start
+                    logger.info(f"Image generation took {generation_time:.2f}s")
+                else:
+                    # Process without ControlNet
+                    generation_start = time.time()
+                    logger.info(f"Processing with standard pipeline, strength={current_strength}")
+                    result_image = self.pipeline(
+                        prompt,
+                        image=model_input_image,
+                        strength=current_strength,  # Use custom strength if provided
+                        guidance_scale=guidance_scale,
+                        negative_prompt=negative_prompt,
+                        num_steps=25,  # Slightly increased for better quality
+                    ).images[0]
+                    generation_time = time.time() - generation_start
+                    logger.info(f"Image generation took {generation_time:.2f}s")
+                    depth_image = None
             
             # Resize back to original dimensions
             logger.info(f"Resizing result back to original dimensions: {original_width}x{original_height}")
             result_image = result_image.resize((original_width, original_height), Image.Resampling.LANCZOS)
                 
             # Convert result back to bytes with higher quality
-            output_buffer = io.BytesIO()
-            result_image.save(output_buffer, format="JPEG", quality=95)  # Higher quality output
-            processed_data = output_buffer.getvalue()
+            processed_data = encode_jpeg(result_image, quality=95)  # Higher quality output
             
             # Update statistics
             self.processed_frames += 1
@@ -612,9 +620,7 @@ async def apply_diffusion_model(
             resized_image = output_image.resize((width, height), Image.Resampling.LANCZOS)
             
             # Convert back to bytes
-            resized_buffer = io.BytesIO()
-            resized_image.save(resized_buffer, format="JPEG", quality=95)
-            return resized_buffer.getvalue(), depth_image
+            return encode_jpeg(resized_image, quality=95), depth_image
         except Exception as e:
             logger.error(f"Error resizing output image: {e}")
             # Return the processed image without resizing on error
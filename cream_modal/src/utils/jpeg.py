@@ -0,0 +1,97 @@
+import io
+
+import numpy as np
+import torch
+from PIL import Image
+
+from src.utils.logger import logger
+
+# PyTurboJPEG (SIMD libjpeg-turbo) is only installed in the GPU image; PIL is the fallback
+try:
+    from turbojpeg import TurboJPEG, TJPF_RGB
+    turbo_jpeg = TurboJPEG()
+except Exception as e:
+    logger.info(f"TurboJPEG not available, falling back to PIL for JPEG encoding: {e}")
+    turbo_jpeg = None
+
+# nvImageCodec encodes from and decodes into CUDA memory with nvJPEG; it needs a GPU at construction
+try:
+    from nvidia import nvimgcodec
+    nvjpeg_encoder = nvimgcodec.Encoder()
+    nvjpeg_decoder = nvimgcodec.Decoder()
+except Exception as e:
+    logger.info(f"nvImageCodec not available, JPEG coding will run on the CPU: {e}")
+    nvjpeg_encoder = None
+    nvjpeg_decoder = None
+
+
+def encode_jpeg(image: Image.Image, quality: int = 95) -> bytes:
+    """
+    Encode an image as JPEG bytes.
+
+    Args:
+        image: The image to encode
+        quality: JPEG quality (1-100)
+
+    Returns:
+        The encoded JPEG bytes
+    """
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+
+    if turbo_jpeg is not None:
+        return turbo_jpeg.encode(np.asarray(image), quality=quality, pixel_format=TJPF_RGB)
+
+    output_buffer = io.BytesIO()
+    image.save(output_buffer, format="JPEG", quality=quality)
+    return output_buffer.getvalue()
+
+
+def encode_jpeg_gpu(images: torch.Tensor, quality: int = 95) -> list[bytes]:
+    """
+    Encode a batch of CUDA images as JPEG bytes without copying the pixels to the host.
+
+    Args:
+        images: Floating point tensor of shape (batch, 3, height, width) in [0, 1], as returned
+            by diffusers pipelines with output_type="pt"
+        quality: JPEG quality (1-100)
+
+    Returns:
+        The encoded JPEG bytes, one entry per image
+    """
+    if nvjpeg_encoder is None:
+        raise RuntimeError("nvImageCodec is not available")
+
+    # nvJPEG expects interleaved 8-bit RGB. Scale in float32: bfloat16 can't represent
+    # every 8-bit value after the multiply
+    pixels = (images.float().clamp(0, 1) * 255).round().to(torch.uint8).permute(0, 2, 3, 1).contiguous()
+    params = nvimgcodec.EncodeParams(quality=quality)
+    # Encode on the current torch stream, so it reads the pixels after the conversion above
+    encoded = nvjpeg_encoder.encode(
+        [nvimgcodec.as_image(image) for image in pixels], "jpeg",
+        params=params, cuda_stream=torch.cuda.current_stream().cuda_stream
+    )
+    return [bytes(data) for data in encoded]
+
+
+def decode_jpeg_gpu(data: bytes) -> torch.Tensor:
+    """
+    Decode JPEG bytes straight into CUDA memory with nvJPEG.
+
+    Args:
+        data: The encoded JPEG bytes
+
+    Returns:
+        uint8 CUDA tensor of shape (3, height, width) in RGB order
+    """
+    if nvjpeg_decoder is None:
+        raise RuntimeError("nvImageCodec is not available")
+
+    # Grayscale and CMYK sources are converted to RGB by the decoder. Decode on the
+    # current torch stream, so the work that reads the tensor is ordered after it.
+    decoded = nvjpeg_decoder.decode(data, cuda_stream=torch.cuda.current_stream().cuda_stream)
+    if decoded is None:
+        raise ValueError("nvJPEG could not decode the frame")
+
+    # The decoded image exposes __cuda_array_interface__ (HWC), so this is a zero-copy view
+    return torch.as_tensor(decoded, device="cuda").permute(2, 0, 1)
@@ -7,6 +7,7 @@ import AdminDebug from '@/components/AdminDebug';
 import { useAuth } from '@/context/AuthContext';
 import Image from 'next/image';
 import { supabase } from '@/lib/supabase';
+import { withFrameDataUrl } from '@/lib/utils';
 import { Clock, Coins, Sparkles } from "lucide-react";
 import { formatNumber } from '@/utils/formatters';
 import { Dialog, DialogContent, DialogDescription, DialogHeader, DialogTitle, DialogTrigger } from "@/components/ui/dialog";
@@ -528,6 +529,8 @@ export default function StreamPage() {
   const currentStreamIdRef = useRef<string | null>(null);
   const frameTimeoutRef = useRef<NodeJS.Timeout | null>(null);
   const processingTimesRef = useRef<number[]>([]);
+  // Settings of the processed frames that follow it (is_original, processed, style_prompt, ...)
+  const frameMetaRef = useRef<Record<string, unknown>>({});
   
   // Add authentication check
   useEffect(() => {
@@ -692,9 +695,18 @@ export default function StreamPage() {
 
     wsRef.current.onmessage = (event) => {
       try {
-        const data = JSON.parse(event.data);
+        let data = withFrameDataUrl(JSON.parse(event.data));
         console.log(`Received WebSocket message type: ${data.type}`);
 
+        // Frame messages carry only the frame; the settings come from frame_meta
+        if (data.type === "frame_meta") {
+          frameMetaRef.current = data;
+          return;
+        }
+        if (data.type === "frame") {
+          data = { ...frameMetaRef.current, ...data };
+        }
+
         // Handle different message types
         if (data.type === "pong") {
           console.log("Received pong response");
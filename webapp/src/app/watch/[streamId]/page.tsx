@@ -4,6 +4,7 @@ import { useEffect, useRef, useState, useCallback } from "react";
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from "@/components/ui/card";
 import { useRouter, useParams } from "next/navigation";
 import Image from "next/image";
+import { withFrameDataUrl } from "@/lib/utils";
 
 export default function WatchPage() {
   const params = useParams();
@@ -33,6 +34,9 @@ export default function WatchPage() {
   const reconnectAttempts = useRef(0);
   const frameActivityTimerRef = useRef<NodeJS.Timeout | null>(null);
   const streamStatusCheckRef = useRef<NodeJS.Timeout | null>(null);
+  // Metadata of the frames that follow it, and the object URLs created for binary frames
+  const frameMetaRef = useRef<Record<string, unknown>>({});
+  const frameUrlsRef = useRef<string[]>([]);
   const [isLoading, setIsLoading] = useState(true); // Add a loading state
   
   useEffect(() => {
@@ -93,9 +97,10 @@ export default function WatchPage() {
     
     // Format the URL with the proper path pattern for Modal
     // Remove the 'ws/' prefix to avoid double 'ws/ws/'
+    // binary=true: frames arrive as raw JPEG bytes instead of base64 inside JSON
     const fullWsUrl = wsUrl.endsWith('/') 
-      ? `${wsUrl}viewer/${streamId}` 
-      : `${wsUrl}/viewer/${streamId}`;
+      ? `${wsUrl}viewer/${streamId}?binary=true` 
+      : `${wsUrl}/viewer/${streamId}?binary=true`;
     
     console.log(`Connecting to WebSocket at: ${fullWsUrl}`);
     
@@ -110,6 +115,8 @@ export default function WatchPage() {
     }
     
     const ws = new WebSocket(fullWsUrl);
+    // Binary frames are parsed synchronously: the timestamp header is read from the buffer
+    ws.binaryType = 'arraybuffer';
     wsRef.current = ws;
     
     // Add a timeout to detect if the stream doesn't exist - longer but with no status update
@@ -220,7 +227,30 @@ export default function WatchPage() {
       resetHeartbeat(); // Reset heartbeat counter on any message received
       
       try {
-        const data = JSON.parse(event.data);
+        let data;
+        if (event.data instanceof ArrayBuffer) {
+          // Binary frames are an 8-byte big-endian timestamp (ms since epoch) followed by
+          // the JPEG; the rest of their metadata came in the last frame_meta message
+          const header = new DataView(event.data, 0, 8);
+          const timestamp = header.getUint32(0) * 2 ** 32 + header.getUint32(4);
+          const frameUrl = URL.createObjectURL(new Blob([event.data.slice(8)], { type: 'image/jpeg' }));
+          // Keep the URLs of the frames that may still be on screen, release older ones
+          frameUrlsRef.current.push(frameUrl);
+          while (frameUrlsRef.current.length > 3) {
+            URL.revokeObjectURL(frameUrlsRef.current.shift()!);
+          }
+          data = { ...frameMetaRef.current, type: 'frame', frame: frameUrl, frame_size: event.data.byteLength - 8, timestamp };
+        } else {
+          data = withFrameDataUrl(JSON.parse(event.data));
+          if (data.type === 'frame_meta') {
+            frameMetaRef.current = data;
+            return;
+          }
+          if (data.type === 'frame') {
+            // Frame messages carry only the frame; the settings come from frame_meta
+            data = { ...frameMetaRef.current, ...data };
+          }
+        }
         console.log("WATCH DEBUG: Received message type:", data.type);
         
         if (data.type === 'pong') {
@@ -306,13 +336,14 @@ export default function WatchPage() {
             return;
           }
           
-          const frameSize = data.frame.length;
+          const frameSize = data.frame_size ?? data.frame.length;
           // Log more detailed information about each received frame
           console.log(`WATCH DEBUG: Received frame #${framesReceivedRef.current + 1}, size: ${Math.round(frameSize / 1024)}KB, is_original: ${data.is_original}, processed: ${data.processed}, processor_type: ${data.processor_type || 'unknown'}, keys: ${Object.keys(data).join(',')}`);
           
-          // Validate the frame data (should be a valid data URL)
-          if (!data.frame.startsWith('data:image')) {
-            console.error(`WATCH DEBUG: Invalid frame data, doesn't start with 'data:image'`);
+          // Validate the frame data (should be a valid data URL, or an object URL for binary frames)
+          const isImageUrl = data.frame.startsWith('data:image') || data.frame.startsWith('blob:');
+          if (!isImageUrl) {
+            console.error(`WATCH DEBUG: Invalid frame data, doesn't start with 'data:image' or 'blob:'`);
             return;
           }
           
@@ -356,7 +387,7 @@ export default function WatchPage() {
           
           // Update aspect ratio from first frame (or when dimensions change)
           // Only do this for the first frame or when we don't have an aspect ratio yet
-          if ((framesReceivedRef.current === 0 || aspectRatio === "56.25%") && data.frame.startsWith('data:image')) {
+          if ((framesReceivedRef.current === 0 || aspectRatio === "56.25%") && isImageUrl) {
             const img = new window.Image();
             img.onload = () => {
               const ratio = (img.height / img.width) * 100;
@@ -4,3 +4,12 @@ import { twMerge } from "tailwind-merge"
 export function cn(...inputs: ClassValue[]) {
   return twMerge(clsx(inputs))
 }
+
+// Frame messages from the processing server carry bare base64 JPEG data
+// (frame_encoding "base64-jpeg"); prefix it here so it can be used as an image src
+export function withFrameDataUrl<T extends { frame?: string | null; frame_encoding?: string }>(data: T): T {
+  if (data.frame && data.frame_encoding === "base64-jpeg") {
+    data.frame = `data:image/jpeg;base64,${data.frame}`
+  }
+  return data
+}